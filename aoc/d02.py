@@ -1,33 +1,73 @@
 #! /usr/bin/env python
 
-from aoc.intcode import IntCodeCPU
-from aoc.utils import load_input
+import itertools
+
+import numpy as np
+
+from aoc.intcode import LaneState, SymbolicError, create_cpu, load_program, run_batch, search, solve_for_output
+from aoc.utils import input_path
 
 
 def get_program_output(program, n=None, v=None):
-    program = [int(i) for i in program.split(",")]
+    if isinstance(program, str):
+        program = [int(i) for i in program.split(",")]
+    else:
+        program = list(program)
+
     if n is not None:
         program[1] = n
     if v is not None:
         program[2] = v
 
-    icr = IntCodeCPU(program)
+    icr = create_cpu(program)
     icr.run()
 
     return icr.peek(0)
 
 
 def get_input_for_output(program, expected_output):
-    for n in range(100):
-        for v in range(100):
-            if get_program_output(program, n, v) == expected_output:
-                return 100 * n + v
+    try:
+        solution = solve_for_output(program, (1, 2), expected_output, range(100))
+    except SymbolicError:
+        return sweep_input_for_output(program, expected_output)
+
+    if solution is None:
+        raise Exception("Expected output not found")
+
+    n, v = solution
+    return 100 * n + v
+
+
+def sweep_input_for_output(program, expected_output):
+    pairs = [(n, v) for n in range(100) for v in range(100)]
+
+    cpu = run_batch(program, (1, 2), pairs)
+    matches = np.flatnonzero((cpu.state == LaneState.HALTED) & (cpu.peek(0) == expected_output))
+    if not matches.size:
+        raise Exception("Expected output not found")
+
+    n, v = pairs[matches[0]]
+    return 100 * n + v
+
+
+def search_input_for_output(program, expected_output, **kwargs):
+    """Same as sweep_input_for_output, with worker processes."""
+    best = search(
+        _output_for, program, itertools.product(range(100), repeat=2), key=lambda r: r == expected_output, **kwargs
+    )
+    if best is None or best[0] != expected_output:
+        raise Exception("Expected output not found")
+
+    n, v = best[1]
+    return 100 * n + v
+
 
-    raise Exception("Expected output not found")
+def _output_for(image, pair):
+    return get_program_output(image, *pair)
 
 
 def main():
-    program = load_input("d02.txt")
+    program = load_program(input_path("d02.txt"))
 
     print(f"Part 1: {get_program_output(program, 12, 2)}")
     print(f"Part 2: {get_input_for_output(program, 19690720)}")
@@ -1,18 +1,18 @@
 #! /usr/bin/env python
 
-from aoc.intcode import IntCodeCPU
-from aoc.utils import load_input
+from aoc.intcode import create_cpu, load_program
+from aoc.utils import input_path
 
 
 def get_diagnostic_code(program, system_id):
-    r = IntCodeCPU(program)
+    r = create_cpu(program)
     r.run((system_id,))
 
     return r.pop_output()[-1]
 
 
 def main():
-    program = load_input("d05.txt")
+    program = load_program(input_path("d05.txt"))
 
     print(f"Part 1: {get_diagnostic_code(program, 1)}")
     print(f"Part 2: {get_diagnostic_code(program, 5)}")
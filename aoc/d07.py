@@ -2,65 +2,104 @@
 
 import itertools
 
-from aoc.intcode import IntCodeCPU, Interrupt
-from aoc.utils import load_input
+import numpy as np
+
+from aoc.intcode import (
+    BatchIntCodeCPU,
+    Chain,
+    LaneState,
+    MemoizedRunner,
+    Ring,
+    Scheduler,
+    create_cpu,
+    load_program,
+    search,
+)
+from aoc.utils import input_path
 
 
 def get_thruster_output(program, phase_settings):
-    outputs = []
+    return _run_amplifiers(program, phase_settings, Chain())
 
-    for ps in phase_settings:
-        inputs = (ps, outputs[0] if outputs else 0)
-        runner = IntCodeCPU(program, ps)
-        runner.run(inputs)
-        outputs = runner.pop_output()
 
-    return outputs[0]
+def get_thruster_output_with_feedback(program, phase_settings):
+    # The last amplifier's final output goes back to the first one, which has halted by then
+    return _run_amplifiers(program, phase_settings, Ring())
 
 
-def get_thruster_output_with_feedback(program, phase_settings):
-    cr = 0
-    nb_runners = len(phase_settings)
-    runners = [None] * nb_runners
+def _run_amplifiers(program, phase_settings, topology):
+    scheduler = Scheduler((create_cpu(program, n) for n in range(len(phase_settings))), topology)
+    for n, ps in enumerate(phase_settings):
+        scheduler.send(n, ps)
+    scheduler.send(0, 0)
+
+    scheduler.run()
+
+    return scheduler.pop_output()[-1]
 
-    output = []
 
-    def _get_runner(n):
-        r = runners[n]
-        if not r:
-            r = IntCodeCPU(program, n)
-            runners[n] = r
+def get_max_thruster_output(program, phases, feedback=False):
+    """Try every permutation of `phases` at once, one lane per permutation."""
+    phase_settings = np.array(list(itertools.permutations(phases)))
+    nb_lanes, nb_amps = phase_settings.shape
 
-        return r
+    amps = [BatchIntCodeCPU(program, nb_lanes) for _ in range(nb_amps)]
+    signals = np.zeros(nb_lanes, dtype=np.int64)
+    first_round = True
 
     while True:
-        runner = _get_runner(cr % nb_runners)
+        for i, amp in enumerate(amps):
+            if first_round:
+                inputs = np.column_stack((phase_settings[:, i], signals))
+            else:
+                inputs = signals[:, np.newaxis]
+
+            state = amp.run(inputs)
+            if (state == LaneState.FAULTED).any():
+                raise ValueError(f"Amplifier {i} faulted")
+
+            signals = np.array([o[-1] if o else s for o, s in zip(amp.pop_output(), signals)])
+
+        first_round = False
 
-        if cr < nb_runners:
-            inputs = (phase_settings[cr], output[0] if output else 0)
-        else:
-            inputs = output
+        if not feedback or (state == LaneState.HALTED).all():
+            return int(signals.max())
+
+
+def get_max_thruster_output_memoized(program, phases, feedback=False, runner=None):
+    """Same as get_max_thruster_output, running each amplifier through a MemoizedRunner."""
+    runner = runner or MemoizedRunner()
+    return max(_run_memoized_amplifiers(runner, program, ps, feedback) for ps in itertools.permutations(phases))
+
+
+def _run_memoized_amplifiers(runner, program, phase_settings, feedback):
+    # Each amplifier is run again with all of its input so far, the runner resuming it from its last state
+    inputs = [[ps] for ps in phase_settings]
+    signal = 0
+
+    while True:
+        for amp_inputs in inputs:
+            amp_inputs.append(signal)
+            result = runner.run(program, amp_inputs)
+            signal = result.output[-1]
 
-        try:
-            runner.run(inputs)
-        except Exception as e:
-            print(e)
-        else:
-            if all(r.is_halted() for r in runners):
-                return runner.pop_output()[0]
+        if not feedback or result.halted:
+            return signal
 
-        output = runner.pop_output()
 
-        cr += 1
+def search_max_thruster_output(program, phases, feedback=False, **kwargs):
+    """Same as get_max_thruster_output, with the permutations spread over worker processes."""
+    evaluate = get_thruster_output_with_feedback if feedback else get_thruster_output
+    return search(evaluate, program, itertools.permutations(phases), **kwargs)[0]
 
 
 def main():
-    program = load_input("d07.txt")
+    program = load_program(input_path("d07.txt"))
 
-    p1 = max(get_thruster_output(program, ps) for ps in itertools.permutations(range(5)))
+    p1 = get_max_thruster_output(program, range(5))
     print(f"Part 1: {p1}")
 
-    p2 = max(get_thruster_output_with_feedback(program, ps) for ps in itertools.permutations(range(5, 10)))
+    p2 = get_max_thruster_output(program, range(5, 10), feedback=True)
     print(f"Part 2: {p2}")
 
 
@@ -2,12 +2,12 @@
 
 from time import time as ts
 
-from aoc.intcode import IntCodeCPU
-from aoc.utils import load_input
+from aoc.intcode import create_cpu, load_program
+from aoc.utils import input_path
 
 
 def get_boost_keycode(program):
-    cpu = IntCodeCPU(program)
+    cpu = create_cpu(program)
     cpu.run((1,))
     output = cpu.pop_output()
     assert len(output) == 1
@@ -15,7 +15,7 @@ def get_boost_keycode(program):
 
 
 def get_coords(program):
-    cpu = IntCodeCPU(program)
+    cpu = create_cpu(program)
     cpu.run((2,))
     output = cpu.pop_output()
     assert len(output) == 1
@@ -23,7 +23,7 @@ def get_coords(program):
 
 
 def main():
-    program = load_input("d09.txt")
+    program = load_program(input_path("d09.txt"))
 
     _t = ts()
     p1 = get_boost_keycode(program)
@@ -1,8 +1,8 @@
 #! /usr/bin/env python
 from enum import IntEnum
 
-from aoc.intcode import IntCodeCPU, InterruptCode
-from aoc.utils import load_input
+from aoc.intcode import Controller, create_cpu, load_program
+from aoc.utils import input_path, split_list
 
 
 class Color(IntEnum):
@@ -71,28 +71,40 @@ class Robot:
         return self.x, self.y
 
 
-def run_robot(program, initial_coords, initial_color):
-    panels = {initial_coords: Panel(*initial_coords, initial_color)}
-    robot = Robot(*initial_coords)
+class RobotController(Controller):
+    """Send the color of the panel under the robot, then paint it and move as the program outputs."""
+
+    def __init__(self, initial_coords, initial_color):
+        self.panels = {initial_coords: Panel(*initial_coords, initial_color)}
+        self.robot = Robot(*initial_coords)
 
-    cpu = IntCodeCPU(program)
+    def next_input(self, cpu, output):
+        self._apply(output)
 
-    while True:
-        p = panels.get(robot.position)
+        p = self.panels.get(self.robot.position)
         if not p:
-            p = Panel(*robot.position)
-            panels[robot.position] = p
-
-        res = cpu.run((p.color.value,))
-        if res == InterruptCode.WAITING_ON_INPUT:
-            c, td = cpu.pop_output()
-            p.paint(Color(c))
-            robot.turn(TurnDirection(td))
-            robot.move_forward()
-        else:
-            break
+            p = Panel(*self.robot.position)
+            self.panels[self.robot.position] = p
+
+        return p.color.value
+
+    def on_halt(self, cpu, output):
+        self._apply(output)
+
+    def _apply(self, output):
+        for c, td in split_list(output, 2):
+            self.panels[self.robot.position].paint(Color(c))
+            self.robot.turn(TurnDirection(td))
+            self.robot.move_forward()
+
+
+def run_robot(program, initial_coords, initial_color):
+    controller = RobotController(initial_coords, initial_color)
+
+    cpu = create_cpu(program)
+    cpu.drive(controller)
 
-    return panels
+    return controller.panels
 
 
 def render_panels(panels):
@@ -121,7 +133,7 @@ def render_panels(panels):
 
 
 def main():
-    program = load_input("d11.txt")
+    program = load_program(input_path("d11.txt"))
 
     panels = run_robot(program, (0, 0), Color.BLACK)
 
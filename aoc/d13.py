@@ -2,21 +2,14 @@
 import sys
 from enum import IntEnum
 
-from aoc.intcode import IntCodeCPU, InterruptCode
-from aoc.utils import load_input, split_list
+from aoc.intcode import Controller, create_cpu, load_program
+from aoc.utils import input_path, split_list
 
 
 def get_blocks_after_first_run(program):
-    cpu = IntCodeCPU(program)
-    cpu.run()
-    output = cpu.pop_output()
+    cpu = create_cpu(program)
 
-    c = 0
-    for i in range(2, len(output), 3):
-        if output[i] == 2:
-            c += 1
-
-    return c
+    return sum(1 for _, _, t in cpu.frames(3) if t == Tile.BLOCK)
 
 
 class Tile(IntEnum):
@@ -68,8 +61,8 @@ class GameState:
         return self._ball_pos[0]
 
     @classmethod
-    def init(cls, values) -> "GameState":
-        pixels = [Pixel(t) for t in cls._get_tuples(values)]
+    def init(cls, frames) -> "GameState":
+        pixels = [Pixel(t) for t in frames]
 
         w = max(p.x for p in pixels) + 1
         h = max(p.y for p in pixels) + 1
@@ -79,22 +72,15 @@ class GameState:
 
         return gs
 
-    def update(self, values):
+    def update(self, frames):
         self._frame += 1
-        pixels = []
 
-        for tup in split_list(values, 3):
+        for tup in frames:
             if tup[0] == -1:
                 self._score = tup[2]
             else:
-                pixels.append(Pixel(tup))
-
-        self.set_tiles(pixels)
-
-    @staticmethod
-    def _get_tuples(values):
-        for tup in split_list(values, 3):
-            yield tuple(int(v) for v in tup)
+                p = Pixel(tup)
+                self.set(p.x, p.y, p.v)
 
     def set_tiles(self, pixels: [Pixel]):
         for p in pixels:
@@ -126,43 +112,56 @@ class GameState:
             print(line)
 
 
-def play(program, coins=2, render=False):
-    if render:
-        print("\033[2J")
-
-    cpu = IntCodeCPU(program)
-    cpu.poke(0, coins)
+class Player(Controller):
+    """Keep the paddle under the ball, updating the game state with the frames output before each move."""
 
-    interrupt = cpu.run()
-    if interrupt != InterruptCode.WAITING_ON_INPUT:
-        raise ValueError(f"Unexpected program state: Interrupt = {interrupt}")
+    def __init__(self, render=False):
+        self.gs = None
+        self._render = render
 
-    gs = GameState.init(cpu.pop_output())
+    def next_input(self, cpu, output):
+        if self.gs is None:
+            self.gs = GameState.init(split_list(output, 3))
+        else:
+            self._update(output)
 
-    while True:
-        delta = gs.ball_x - gs.paddle_x
+        delta = self.gs.ball_x - self.gs.paddle_x
         if delta > 0:
-            in_ = (1,)
+            return 1
         elif delta < 0:
-            in_ = (-1,)
+            return -1
         else:
-            in_ = (0,)
+            return 0
 
-        res = cpu.run(in_)
-        gs.update(cpu.pop_output())
+    def on_halt(self, cpu, output):
+        if self.gs is None:
+            raise ValueError("Unexpected program state: halted before the game started")
 
-        if render:
-            gs.render()
+        self._update(output)
+
+    def _update(self, output):
+        self.gs.update(split_list(output, 3))
+
+        if self._render:
+            self.gs.render()
             sleep(0.015)
 
-        if res is None:
-            break
 
-    return gs.score
+def play(program, coins=2, render=False):
+    if render:
+        print("\033[2J")
+
+    cpu = create_cpu(program)
+    cpu.poke(0, coins)
+
+    player = Player(render)
+    cpu.drive(player)
+
+    return player.gs.score
 
 
 def main():
-    program = load_input("d13.txt")
+    program = load_program(input_path("d13.txt"))
 
     print(f"Part 1: {get_blocks_after_first_run(program)}")
 
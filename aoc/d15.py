@@ -1,10 +1,11 @@
 #! /usr/bin/env python
 import sys
+from collections import deque
 from enum import IntEnum
 from time import time as ts
 
-from aoc.intcode import IntCodeCPU, InterruptCode
-from aoc.utils import load_input
+from aoc.intcode import InterruptCode, create_cpu, load_program
+from aoc.utils import input_path
 
 
 def log(*args, **kwargs):
@@ -16,7 +17,6 @@ class Tile(IntEnum):
     EMPTY = 1
     WALL = 2
     OXYGEN = 3
-    ROBOT = 4
 
 
 class Direction(IntEnum):
@@ -46,45 +46,15 @@ class Point:
         return self.x == o.x and self.y == o.y
 
 
-class Robot:
-    def __init__(self, x, y, direction):
-        self.pos = Point(x, y)
-        self.direction = direction
-
-    def next_pos(self) -> Point:
-        return self.pos.translate(self.direction)
-
-    def set_pos(self, pos: Point):
-        self.pos = pos
-
-    def turn_right(self):
-        self.direction = {
-            Direction.UP: Direction.RIGHT,
-            Direction.DOWN: Direction.LEFT,
-            Direction.LEFT: Direction.UP,
-            Direction.RIGHT: Direction.DOWN,
-        }[self.direction]
-
-    def turn_left(self):
-        self.direction = {
-            Direction.UP: Direction.LEFT,
-            Direction.DOWN: Direction.RIGHT,
-            Direction.LEFT: Direction.DOWN,
-            Direction.RIGHT: Direction.UP,
-        }[self.direction]
-
-
 class Map:
     _char_map = {
         Tile.UNKNOWN: " ",
         Tile.EMPTY: " ",
         Tile.WALL: "\033[31m█\033[0m",
         Tile.OXYGEN: "\033[32m▣\033[0m",
-        Tile.ROBOT: "\033[33m◉\033[0m",
     }
 
-    def __init__(self, robot):
-        self.robot = robot
+    def __init__(self):
         self.orig = Point(0, 0)
         self.oxy_pos = None
         self.tiles = {self.orig.tuple: Tile.EMPTY}
@@ -109,47 +79,46 @@ class Map:
 
         for y in range(min_y, max_y + 1):
             line = [self._char_map[self.get_tile(x, y)] for x in range(min_x, max_x + 1)]
-            if self.robot.pos.y == y:
-                line[self.robot.pos.x - min_x] = self._char_map[Tile.ROBOT]
-
             print("".join(line))
 
 
 def generate_floor(program):
-    robot = Robot(0, 0, Direction.UP)
-    floor = Map(robot)
+    floor = Map()
 
-    cpu = IntCodeCPU(program)
+    cpu = create_cpu(program)
 
     interrupt = cpu.run()
     if interrupt != InterruptCode.WAITING_ON_INPUT:
         raise ValueError(f"Unexpected program state: Interrupt = {interrupt}")
 
-    while True:
-        res = cpu.run((robot.direction,))
-        out = cpu.pop_output()
-        if len(out) > 1:
-            raise ValueError(f"Output too long: {out}")
-
-        out = out[0]
-        new_pos = robot.next_pos()
-        if out == 0:
-            floor.set_tile(new_pos.x, new_pos.y, Tile.WALL)
-            robot.turn_left()
-        elif out == 1:
-            floor.set_tile(new_pos.x, new_pos.y, Tile.EMPTY)
-            robot.set_pos(new_pos)
-            robot.turn_right()
-        elif out == 2:
-            floor.set_tile(new_pos.x, new_pos.y, Tile.OXYGEN)
-            floor.oxy_pos = Point(new_pos.x, new_pos.y)
-            robot.set_pos(new_pos)
-            robot.turn_right()
-        else:
-            raise ValueError(f"Invalid output: {out}")
-
-        if res is None or robot.pos == floor.orig:
-            break
+    # Explore breadth-first, forking the droid at each open tile instead of walking it back and forth
+    todo = deque([(floor.orig, cpu)])
+    while todo:
+        pos, cpu = todo.popleft()
+
+        for direction in Direction:
+            new_pos = pos.translate(direction)
+            if floor.get_tile(new_pos.x, new_pos.y) != Tile.UNKNOWN:
+                continue
+
+            droid = cpu.fork()
+            droid.run((direction,))
+            out = droid.pop_output()
+            if len(out) != 1:
+                raise ValueError(f"Invalid output: {out}")
+
+            out = out[0]
+            if out == 0:
+                floor.set_tile(new_pos.x, new_pos.y, Tile.WALL)
+            elif out == 1:
+                floor.set_tile(new_pos.x, new_pos.y, Tile.EMPTY)
+                todo.append((new_pos, droid))
+            elif out == 2:
+                floor.set_tile(new_pos.x, new_pos.y, Tile.OXYGEN)
+                floor.oxy_pos = Point(new_pos.x, new_pos.y)
+                todo.append((new_pos, droid))
+            else:
+                raise ValueError(f"Invalid output: {out}")
 
     return floor
 
@@ -164,12 +133,12 @@ def get_distances_from(point, floor):
     distances = {t: 0}
 
     remaining_tiles.remove(t)
-    todo = get_neighbors(t, remaining_tiles)
+    todo = deque(get_neighbors(t, remaining_tiles))
     for x in todo:
         remaining_tiles.remove(x)
 
     while len(todo) > 0:
-        tile = todo.pop(0)
+        tile = todo.popleft()
         dist = min(v for k, v in distances.items() if (abs(tile[0] - k[0]) + abs(tile[1] - k[1])) == 1) + 1
         distances[tile] = dist
 
@@ -194,7 +163,7 @@ def find_max_distance_from_oxy(floor):
 
 
 def main():
-    program = load_input("d15.txt")
+    program = load_program(input_path("d15.txt"))
     floor = generate_floor(program)
     print(f"Part 1: {find_shortest_path(floor)}")
     print(f"Part 2: {find_max_distance_from_oxy(floor)}")
@@ -3,8 +3,8 @@ import itertools
 from enum import Enum
 from time import time as ts
 
-from aoc.intcode import IntCodeCPU
-from aoc.utils import load_input
+from aoc.intcode import create_cpu, load_program
+from aoc.utils import input_path
 
 
 class Direction(Enum):
@@ -85,7 +85,7 @@ class Grid:
 
     @classmethod
     def build(cls, program):
-        cpu = IntCodeCPU(program)
+        cpu = create_cpu(program)
         res = cpu.run()
         if res is not None:
             raise ValueError(f"CPU raised an interrupt: {res}")
@@ -230,7 +230,7 @@ class Grid:
 
 
 def main():
-    program = load_input("d17.txt")
+    program = load_program(input_path("d17.txt"))
     grid = Grid.build(program)
 
     junctions = grid.get_junctions()
@@ -255,7 +255,7 @@ def main():
 
         return encode(",".join(fn))
 
-    cpu = IntCodeCPU(program)
+    cpu = create_cpu(program)
     cpu.poke(0, 2)
     cpu.run(encode(routine))
     for f in functions:
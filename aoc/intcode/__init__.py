@@ -0,0 +1,48 @@
+import os
+
+from aoc.intcode.aio import AsyncIntCodeCPU
+from aoc.intcode.batch import BatchIntCodeCPU, LaneState, run_batch
+from aoc.intcode.compiler import CompiledIntCodeCPU
+from aoc.intcode.control import Controller
+from aoc.intcode.cpu import (
+    DecodedInstr,
+    DriveStats,
+    IntCodeCPU,
+    InterruptCode,
+    Op,
+    Snapshot,
+    dbgprint,
+    read_snapshot,
+    write_snapshot,
+)
+from aoc.intcode.fastforward import FastForwardIntCodeCPU, LoopSummary, summarize_loop
+from aoc.intcode.image import load_program, parse_program
+from aoc.intcode.memo import MemoizedRunner, MemoStats, RunResult
+from aoc.intcode.memory import PagedMemory
+from aoc.intcode.profiling import Profiler
+from aoc.intcode.replay import Checkpoint, TraceRecorder, TraceReplayer
+from aoc.intcode.scheduler import Chain, Mesh, Packets, Ring, Scheduler, SchedulerStats, Topology
+from aoc.intcode.search import search
+from aoc.intcode.shared import ImageRegistry, SharedImage, attach
+from aoc.intcode.symbolic import UNKNOWN, Poly, SymbolicError, run_symbolic, solve_for_output
+from aoc.intcode.tracing import PrintTracer, Tracer
+
+ENGINES = {
+    "interpreter": IntCodeCPU,
+    "compiler": CompiledIntCodeCPU,
+    "fastforward": FastForwardIntCodeCPU,
+}
+
+_default_engine = os.getenv("INTCODE_ENGINE", "interpreter")
+
+
+def create_cpu(program, id_=0, engine=None, **kwargs):
+    """Create a cpu using `engine`, or the one set by the INTCODE_ENGINE environment variable."""
+    engine = engine or _default_engine
+
+    try:
+        cls = ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unsupported engine: {engine}")
+
+    return cls(program, id_, **kwargs)
@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+import argparse
+import sys
+
+from aoc.intcode import ENGINES
+from aoc.intcode.bench import BENCHMARKS, compare, load_baseline, report, run_benchmark, save_baseline
+from aoc.intcode.cpu import InterruptCode
+from aoc.intcode.profiling import Profiler
+
+
+def profile(args):
+    with open(args.program) as f:
+        program = f.read().strip()
+
+    profiler = Profiler()
+    cpu = ENGINES[args.engine](program, tracer=profiler)
+    interrupt = cpu.run(args.input)
+
+    if interrupt == InterruptCode.WAITING_ON_INPUT:
+        print("Stopped waiting on input")
+    print(f"Output: {cpu.pop_output()}\n")
+
+    profiler.report(top=args.top)
+
+
+def bench(args):
+    names = args.benchmark or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = [run_benchmark(name, args.size, ENGINES[args.engine], args.repeat) for name in names]
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    report(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+
+    if baseline is not None and args.max_regression is not None:
+        changes = [compare(r, baseline) for r in results]
+        if any(c is not None and c > args.max_regression for c in changes):
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m aoc.intcode")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    profile_parser = commands.add_parser("profile", help="Run a program and report where its time goes")
+    profile_parser.add_argument("program", help="Program file")
+    profile_parser.add_argument("--input", type=int, action="append", default=[], help="Input value, repeatable")
+    profile_parser.add_argument("--top", type=int, default=20, help="Entries per section of the report")
+    profile_parser.add_argument("--engine", choices=list(ENGINES), default="interpreter")
+    profile_parser.set_defaults(func=profile)
+
+    bench_parser = commands.add_parser("bench", help="Run the synthetic benchmarks")
+    bench_parser.add_argument("benchmark", nargs="*", help=f"Benchmarks to run, among {', '.join(BENCHMARKS)}")
+    bench_parser.add_argument("--size", type=int, help="Problem size, instead of each benchmark's default")
+    bench_parser.add_argument("--engine", choices=list(ENGINES), default="interpreter")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="Timed runs, the best one being kept")
+    bench_parser.add_argument("--baseline", help="Baseline JSON file to compare with")
+    bench_parser.add_argument("--save-baseline", help="Write the results to this baseline JSON file")
+    bench_parser.add_argument(
+        "--max-regression", type=float, help="Exit with an error if ns/instr grew more than this ratio, e.g. 0.1"
+    )
+    bench_parser.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
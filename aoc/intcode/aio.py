@@ -0,0 +1,36 @@
+#! /usr/bin/env python
+import asyncio
+
+from aoc.intcode.cpu import IntCodeCPU, InterruptCode
+
+# Instructions run before giving the event loop back to the other tasks
+DEFAULT_QUANTUM = 1000
+
+
+class AsyncIntCodeCPU(IntCodeCPU):
+    """
+    IntCodeCPU whose READ awaits an asyncio.Queue, and whose output is put to one.
+
+    Cpus are connected by sharing queues, one's output queue being the next one's input queue, and are
+    run as tasks of the same event loop. They run `quantum` instructions at a time, putting what they output
+    to their queue before giving the event loop back.
+    """
+
+    def __init__(self, program, id_=0, input_queue=None, output_queue=None, quantum=DEFAULT_QUANTUM, **kwargs):
+        super().__init__(program, id_, **kwargs)
+
+        self.input_queue = input_queue if input_queue is not None else asyncio.Queue()
+        self.output_queue = output_queue if output_queue is not None else asyncio.Queue()
+        self._quantum = quantum
+
+    async def run_async(self):
+        while not self._halted:
+            interrupt = self.run(max_steps=self._quantum)
+
+            for v in self.pop_output():
+                await self.output_queue.put(v)
+
+            if interrupt == InterruptCode.WAITING_ON_INPUT:
+                self._input.append(await self.input_queue.get())
+            elif interrupt == InterruptCode.BUDGET_EXHAUSTED:
+                await asyncio.sleep(0)
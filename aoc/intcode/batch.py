@@ -0,0 +1,240 @@
+#! /usr/bin/env python
+from enum import IntEnum
+
+import numpy as np
+
+from aoc.intcode.cpu import Op
+
+
+class LaneState(IntEnum):
+    RUNNING = 0
+    WAITING_ON_INPUT = 1
+    HALTED = 2
+    FAULTED = 3
+
+
+class BatchIntCodeCPU:
+    """
+    Run many copies of the same program in lockstep, one lane per row of a numpy memory matrix.
+
+    Lanes can diverge: each one has its own ip and relative offset, and every step executes each opcode
+    present among the running lanes once, masked to the lanes sitting on it. Memory doesn't grow, so a lane
+    that accesses an address outside of `ram_size`, or hits an invalid instruction, is marked FAULTED instead
+    of stopping the others.
+
+    Values are int64 by default and wrap on overflow; pass `dtype=object` for programs needing big numbers.
+    """
+
+    def __init__(self, program, nb_lanes, ram_size=None, dtype=np.int64):
+        if isinstance(program, str):
+            program = [int(i) for i in program.split(",")]
+
+        ram_size = max(ram_size or 0, len(program))
+
+        self._nb_lanes = nb_lanes
+        self._ram_size = ram_size
+
+        self._mem = np.zeros((nb_lanes, ram_size), dtype=dtype)
+        self._mem[:, : len(program)] = program
+
+        self._ip = np.zeros(nb_lanes, dtype=np.int64)
+        self._rel_offset = np.zeros(nb_lanes, dtype=np.int64)
+        self._state = np.full(nb_lanes, LaneState.RUNNING, dtype=np.int8)
+
+        self._input = np.zeros((nb_lanes, 0), dtype=dtype)
+        self._input_pos = np.zeros(nb_lanes, dtype=np.int64)
+        self._output = [[] for _ in range(nb_lanes)]
+
+        self._instr_map = {
+            Op.ADD: self.add,
+            Op.MUL: self.mul,
+            Op.READ: self.read,
+            Op.WRITE: self.write,
+            Op.BNE: self.bne,
+            Op.BEQ: self.beq,
+            Op.LT: self.lt,
+            Op.EQ: self.eq,
+            Op.REL: self.rel,
+            Op.HALT: self.halt,
+        }
+
+    @property
+    def state(self):
+        return self._state.copy()
+
+    def run(self, inputs=None):
+        """
+        Run until every lane is halted, faulted or waiting on input.
+
+        `inputs` holds one row of values per lane, and replaces what was left of the previous ones.
+        """
+        if inputs is not None:
+            self._input = np.asarray(inputs, dtype=self._mem.dtype).reshape(self._nb_lanes, -1)
+            self._input_pos[:] = 0
+
+        self._state[self._state == LaneState.WAITING_ON_INPUT] = LaneState.RUNNING
+
+        while True:
+            lanes = np.flatnonzero(self._state == LaneState.RUNNING)
+            if not lanes.size:
+                break
+
+            out_of_ram = (self._ip[lanes] < 0) | (self._ip[lanes] >= self._ram_size)
+            if out_of_ram.any():
+                self._fault(lanes[out_of_ram])
+                lanes = lanes[~out_of_ram]
+
+            instrs = self._mem[lanes, self._ip[lanes]].astype(np.int64)
+            opcodes = instrs % 100
+
+            for opcode in np.unique(opcodes):
+                mask = opcodes == opcode
+                selected = lanes[mask]
+
+                handler = self._instr_map.get(int(opcode))
+                if handler is None:
+                    self._state[selected] = LaneState.FAULTED
+                    continue
+
+                handler(selected, instrs[mask] // 100)
+
+        return self.state
+
+    def peek(self, idx):
+        return self._mem[:, idx].copy()
+
+    def poke(self, idx, v):
+        """Write `v` at `idx` in every lane. `idx` can be a list of addresses, with `v` a (lanes, addresses) matrix."""
+        self._mem[:, idx] = v
+
+    def pop_output(self):
+        output = self._output
+        self._output = [[] for _ in range(self._nb_lanes)]
+        return output
+
+    def add(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        v2, ok2 = self._ld(lanes, 2, modes)
+        self._st(lanes, 3, modes, v1 + v2, ok1 & ok2)
+        self._advance(lanes, 4)
+
+    def mul(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        v2, ok2 = self._ld(lanes, 2, modes)
+        self._st(lanes, 3, modes, v1 * v2, ok1 & ok2)
+        self._advance(lanes, 4)
+
+    def read(self, lanes, modes):
+        pos = self._input_pos[lanes]
+        has_input = pos < self._input.shape[1]
+
+        waiting = lanes[~has_input]
+        self._state[waiting] = LaneState.WAITING_ON_INPUT
+
+        lanes, modes, pos = lanes[has_input], modes[has_input], pos[has_input]
+        if not lanes.size:
+            return
+
+        self._st(lanes, 1, modes, self._input[lanes, pos], np.ones(lanes.size, dtype=bool))
+        self._input_pos[lanes] += 1
+        self._advance(lanes, 2)
+
+    def write(self, lanes, modes):
+        v, ok = self._ld(lanes, 1, modes)
+        self._fault(lanes[~ok])
+
+        for lane, value in zip(lanes[ok].tolist(), v[ok].tolist()):
+            self._output[lane].append(value)
+
+        self._advance(lanes, 2)
+
+    def bne(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        self._jump(lanes, modes, v1 != 0, ok1)
+
+    def beq(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        self._jump(lanes, modes, v1 == 0, ok1)
+
+    def lt(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        v2, ok2 = self._ld(lanes, 2, modes)
+        self._st(lanes, 3, modes, self._bool(v1 < v2), ok1 & ok2)
+        self._advance(lanes, 4)
+
+    def eq(self, lanes, modes):
+        v1, ok1 = self._ld(lanes, 1, modes)
+        v2, ok2 = self._ld(lanes, 2, modes)
+        self._st(lanes, 3, modes, self._bool(v1 == v2), ok1 & ok2)
+        self._advance(lanes, 4)
+
+    def rel(self, lanes, modes):
+        v, ok = self._ld(lanes, 1, modes)
+        self._fault(lanes[~ok])
+
+        ok_lanes = lanes[ok]
+        self._rel_offset[ok_lanes] += v[ok].astype(np.int64)
+        self._advance(lanes, 2)
+
+    def halt(self, lanes, modes):
+        self._state[lanes] = LaneState.HALTED
+
+    def _param(self, lanes, n):
+        addr = self._ip[lanes] + n
+        ok = addr < self._ram_size
+        return self._mem[lanes, np.where(ok, addr, 0)], ok
+
+    def _addr(self, lanes, n, modes):
+        mode = modes // 10 ** (n - 1) % 10
+        param, ok = self._param(lanes, n)
+
+        addr = param.astype(np.int64) + np.where(mode == 2, self._rel_offset[lanes], 0)
+        ok &= (mode == 0) | (mode == 2)
+        ok &= (addr >= 0) & (addr < self._ram_size)
+
+        return np.where(ok, addr, 0), mode, param, ok
+
+    def _ld(self, lanes, n, modes):
+        addr, mode, param, ok = self._addr(lanes, n, modes)
+
+        immediate = mode == 1
+        v = np.where(immediate, param, self._mem[lanes, addr])
+
+        return v, ok | immediate & (self._ip[lanes] + n < self._ram_size)
+
+    def _st(self, lanes, n, modes, v, ok):
+        addr, _, _, addr_ok = self._addr(lanes, n, modes)
+        ok = ok & addr_ok
+
+        self._fault(lanes[~ok])
+        self._mem[lanes[ok], addr[ok]] = v[ok]
+
+    def _jump(self, lanes, modes, taken, ok):
+        v2, ok2 = self._ld(lanes, 2, modes)
+        ok = ok & ok2
+
+        self._fault(lanes[~ok])
+        self._ip[lanes] = np.where(taken, v2.astype(np.int64), self._ip[lanes] + 3)
+
+    def _bool(self, cond):
+        return np.where(cond, 1, 0).astype(self._mem.dtype)
+
+    def _advance(self, lanes, size):
+        self._ip[lanes] += size
+
+    def _fault(self, lanes):
+        self._state[lanes] = LaneState.FAULTED
+
+    def __repr__(self):
+        return f"{type(self).__name__}<{self._nb_lanes} lanes>"
+
+
+def run_batch(program, addrs, values, inputs=None, **kwargs):
+    """Run one lane per row of `values`, after poking values[lane][i] at addrs[i]. Returns the stopped cpu."""
+    values = np.asarray(values)
+
+    cpu = BatchIntCodeCPU(program, len(values), **kwargs)
+    cpu.poke(list(addrs), values)
+    cpu.run(inputs)
+
+    return cpu
@@ -0,0 +1,166 @@
+#! /usr/bin/env python
+import json
+import tracemalloc
+from collections import namedtuple
+from time import perf_counter
+
+from aoc.intcode.cpu import IntCodeCPU
+from aoc.intcode.profiling import Profiler
+from aoc.intcode.scheduler import Ring, Scheduler
+
+BenchResult = namedtuple("BenchResult", "name size nb_instrs elapsed peak_memory")
+
+
+def arith_program(size):
+    """Loop `size` times over a few additions, a multiplication and a comparison, then output sum(range(size))."""
+    return [101, -1, 22, 22, 1, 23, 22, 23, 1002, 23, 2, 24, 7, 24, 23, 25, 1005, 22, 0, 4, 23, 99, size, 0, 0, 0]
+
+
+def recursion_program(size):
+    """Compute f(k) = k + f(k - 1) recursively from `size`, with a stack of frames on the relative base."""
+    # fmt: off
+    return [
+        109, 48,                # rb = stack
+        21101, size, 0, 1,      # [rb+1] = size
+        21101, 13, 0, 0,        # [rb+0] = return address
+        1105, 1, 16,            # call f
+        204, 2,                 # output [rb+2]
+        99,
+        # f, with [rb+0] the return address, [rb+1] the argument, and the result going to [rb+2]
+        1206, 1, 41,            # if [rb+1] == 0 goto zero
+        21101, 32, 0, 3,        # [rb+3] = return address
+        21201, 1, -1, 4,        # [rb+4] = [rb+1] - 1
+        109, 3,                 # rb += 3
+        1105, 1, 16,            # call f
+        109, -3,                # rb -= 3
+        22201, 1, 5, 2,         # [rb+2] = [rb+1] + [rb+5]
+        2105, 1, 0,             # return
+        21101, 0, 0, 2,         # zero: [rb+2] = 0
+        2105, 1, 0,             # return
+    ]
+    # fmt: on
+
+
+def countdown_program():
+    """Read a value, pass it on decremented, until it reaches 0."""
+    return [3, 15, 1001, 15, -1, 15, 1006, 15, 14, 4, 15, 1105, 1, 0, 99, 0]
+
+
+def counted_loop_program(size):
+    """Step two counters, by 1 and 3, until the first one reaches `size`, then output the second one."""
+    return [1001, 19, 1, 19, 1001, 20, 3, 20, 7, 19, 18, 21, 1005, 21, 0, 4, 20, 99, size, 0, 0, 0]
+
+
+def self_modifying_program(size):
+    """Loop `size` times over an ADD whose immediate operand gets incremented by the next instruction."""
+    return [1101, 0, 0, 19, 1001, 1, 1, 1, 1001, 18, -1, 18, 1005, 18, 0, 4, 19, 99, size, 0]
+
+
+def run_arith(size, make_cpu):
+    return _run_single(make_cpu(arith_program(size)))
+
+
+def run_recursion(size, make_cpu):
+    return _run_single(make_cpu(recursion_program(size)))
+
+
+def run_ping_pong(size, make_cpu):
+    scheduler = Scheduler([make_cpu(countdown_program()) for _ in range(2)], Ring())
+    scheduler.send(0, size)
+    scheduler.run()
+
+    return scheduler.stats.messages
+
+
+def run_counted_loop(size, make_cpu):
+    return _run_single(make_cpu(counted_loop_program(size)))
+
+
+def run_self_modifying(size, make_cpu):
+    return _run_single(make_cpu(self_modifying_program(size)))
+
+
+def _run_single(cpu):
+    cpu.run()
+    return cpu.pop_output()[-1]
+
+
+# name: (workload, default size)
+BENCHMARKS = {
+    "arith": (run_arith, 100_000),
+    "recursion": (run_recursion, 20_000),
+    "ping_pong": (run_ping_pong, 50_000),
+    "counted_loop": (run_counted_loop, 100_000),
+    "self_modifying": (run_self_modifying, 50_000),
+}
+
+
+def run_benchmark(name, size=None, cpu_class=IntCodeCPU, repeat=3):
+    """
+    Run a benchmark, keeping the best of `repeat` timings.
+
+    Instructions are counted by a separate profiled run, and the peak memory by another one under tracemalloc,
+    so that neither slows down the timed ones. Instructions skipped by engines that fast-forward loops count as
+    executed.
+    """
+    workload, default_size = BENCHMARKS[name]
+    size = size or default_size
+
+    profiler = Profiler()
+    workload(size, lambda program: cpu_class(program, tracer=profiler))
+
+    elapsed = float("inf")
+    for _ in range(repeat):
+        t = perf_counter()
+        workload(size, cpu_class)
+        elapsed = min(elapsed, perf_counter() - t)
+
+    tracemalloc.start()
+    try:
+        workload(size, cpu_class)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(name, size, profiler.nb_instrs + profiler.nb_skipped, elapsed, peak_memory)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path):
+    baseline = {r.name: {"size": r.size, "ns_per_instr": ns_per_instr(r)} for r in results}
+
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def ns_per_instr(result):
+    return result.elapsed * 1e9 / result.nb_instrs
+
+
+def compare(result, baseline):
+    """Relative change of the time per instruction against the baseline, None if it has no comparable entry."""
+    entry = baseline.get(result.name)
+    if entry is None or entry["size"] != result.size:
+        return None
+
+    return ns_per_instr(result) / entry["ns_per_instr"] - 1
+
+
+def report(results, baseline=None, file=None):
+    print(f"{'Benchmark':<16} {'Size':>8} {'Instrs':>10} {'Instr/s':>12} {'ns/instr':>9} {'Peak mem':>10}", file=file)
+
+    for r in results:
+        line = (
+            f"{r.name:<16} {r.size:>8} {r.nb_instrs:>10} {r.nb_instrs / r.elapsed:>12,.0f} "
+            f"{ns_per_instr(r):>9.1f} {r.peak_memory / 1024:>8.0f}kB"
+        )
+
+        change = compare(r, baseline) if baseline is not None else None
+        if change is not None:
+            line += f" {change:>+8.1%}"
+
+        print(line, file=file)
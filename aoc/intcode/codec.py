@@ -0,0 +1,89 @@
+#! /usr/bin/env python
+import struct
+from array import array
+
+_int64 = struct.Struct("<q")
+
+# Values are stored as int64 when they fit, and escape to their decimal representation when they don't
+_INT64 = b"q"
+_DECIMAL = b"s"
+
+# Arrays are stored with the narrowest of these typecodes that fits all their values, tagged with it
+_ARRAY_TYPECODES = ("b", "h", "i", "q")
+_ARRAY_KINDS = {tc.encode(): tc for tc in _ARRAY_TYPECODES}
+_ARRAY_LIMITS = [(tc, 1 << (array(tc).itemsize * 8 - 1)) for tc in _ARRAY_TYPECODES]
+
+
+def write_int(f, v):
+    try:
+        f.write(_INT64 + _int64.pack(v))
+    except struct.error:
+        _write_decimal(f, str(v))
+
+
+def read_int(f):
+    kind = _read(f, 1)
+    if kind == _INT64:
+        return _int64.unpack(_read(f, _int64.size))[0]
+    if kind == _DECIMAL:
+        return int(_read_decimal(f))
+
+    raise ValueError(f"Invalid value kind: {kind!r}")
+
+
+def write_ints(f, values):
+    if not isinstance(values, (list, array)):
+        values = list(values)
+
+    typecode = _narrowest_typecode(values)
+    if typecode is None:
+        _write_decimal(f, ",".join(str(v) for v in values))
+        return
+
+    f.write(typecode.encode() + _int64.pack(len(values)))
+    array(typecode, values).tofile(f)
+
+
+def read_ints(f):
+    kind = _read(f, 1)
+    if kind in _ARRAY_KINDS:
+        (n,) = _int64.unpack(_read(f, _int64.size))
+        values = array(_ARRAY_KINDS[kind])
+        values.frombytes(_read(f, n * values.itemsize))
+        return list(values)
+    if kind == _DECIMAL:
+        data = _read_decimal(f)
+        return [int(v) for v in data.split(",")] if data else []
+
+    raise ValueError(f"Invalid value kind: {kind!r}")
+
+
+def _narrowest_typecode(values):
+    """The narrowest of the array typecodes that fits all `values`, None if not even int64 does."""
+    if not values:
+        return _ARRAY_TYPECODES[0]
+
+    lo, hi = min(values), max(values)
+    for typecode, limit in _ARRAY_LIMITS:
+        if -limit <= lo and hi < limit:
+            return typecode
+
+    return None
+
+
+def _write_decimal(f, s):
+    data = s.encode()
+    f.write(_DECIMAL + _int64.pack(len(data)) + data)
+
+
+def _read_decimal(f):
+    (n,) = _int64.unpack(_read(f, _int64.size))
+    return _read(f, n).decode()
+
+
+def _read(f, n):
+    data = f.read(n)
+    if len(data) != n:
+        raise EOFError("Truncated data")
+
+    return data
@@ -0,0 +1,321 @@
+#! /usr/bin/env python
+from functools import lru_cache
+
+from aoc.intcode.cpu import IntCodeCPU, InterruptCode, Op
+
+# Longest run of instructions translated into a single function
+MAX_BLOCK_SIZE = 64
+
+# Times an address must be reached by the interpreter before a block gets compiled from it
+COMPILE_THRESHOLD = 4
+
+# Entries overwritten more often than this are left to the interpreter
+MAX_RECOMPILES = 8
+
+# Ops that can be translated; anything else ends the block and is left to the interpreter
+_straight_ops = (Op.ADD, Op.MUL, Op.LT, Op.EQ, Op.REL)
+_branch_ops = (Op.BNE, Op.BEQ)
+# Ops ending a block after them
+_terminal_ops = _branch_ops + (Op.WRITE,)
+
+
+class CompiledIntCodeCPU(IntCodeCPU):
+    """
+    IntCodeCPU that translates straight-line basic blocks into python functions.
+
+    Code is interpreted until an address has been reached COMPILE_THRESHOLD times. A block then runs from that
+    address up to, and including, the next branch. READ, HALT and anything that can't be translated are executed
+    by the interpreter. A write into a compiled block drops it, and if the block doing the write is the one being
+    dropped, it exits right after the write. Blocks end on any callback that can snapshot the cpu, a WRITE to an
+    output sink, so the memory only needs to be unshared before running one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Compiled blocks keyed by entry address, False if the entry can't be compiled
+        self._blocks = {}
+        # Block entries covering each address
+        self._block_cells = {}
+        # Number of instructions of each block
+        self._block_sizes = {}
+        # Interpreter visits and compilations per entry
+        self._hits = {}
+        self._compile_counts = {}
+        # Instructions charged to the budget with their block, that an early exit of the block didn't run
+        self._unrun_steps = 0
+
+    def run(self, input_=None, max_steps=None):
+        if self._tracer is not None:
+            # Traces are per instruction, which compiled blocks can't provide
+            return super().run(input_, max_steps)
+
+        # Blocks write python ints to the memory directly
+        self._unshare_memory()
+        self._promote_memory()
+
+        if input_:
+            self._input.extend(input_)
+
+        blocks = self._blocks
+        block_sizes = self._block_sizes
+        decoded = self._decoded
+        hits = self._hits
+
+        # Blocks longer than what's left of the budget are interpreted, so that it's exact
+        budget = max_steps if max_steps is not None else float("inf")
+        self._unrun_steps = 0
+
+        while not self._halted:
+            if budget <= 0:
+                budget = self._refund_steps(budget)
+                if budget <= 0:
+                    return InterruptCode.BUDGET_EXHAUSTED
+
+            block = blocks.get(self._ip)
+            if block is None:
+                nb_hits = hits.get(self._ip, 0) + 1
+                if nb_hits >= COMPILE_THRESHOLD:
+                    block = self._compile_block(self._ip)
+                else:
+                    hits[self._ip] = nb_hits
+
+            if block and block_sizes[self._ip] > budget:
+                budget = self._refund_steps(budget)
+                if block_sizes[self._ip] > budget:
+                    block = None
+
+            if block:
+                if self._shared_memory:
+                    # Snapshotted from a callback since the last block, blocks write to the memory directly
+                    self._unshare_memory()
+                    self._promote_memory()
+
+                budget -= block_sizes[self._ip]
+                self._ip = block(self)
+
+                # Blocks end on their WRITE, if they have one
+                if len(self._output) >= self._output_limit:
+                    return InterruptCode.OUTPUT_READY
+
+                continue
+
+            instr = decoded.get(self._ip)
+            if instr is None:
+                instr = self._decode()
+
+            interrupt = instr.handler(instr)
+            if interrupt is not None:
+                return None if self._halted else interrupt
+
+            self._ip += instr.size
+            budget -= 1
+
+        return None
+
+    def _refund_steps(self, budget):
+        # Only needed once the budget runs low, refunds can only make it larger
+        budget += self._unrun_steps
+        self._unrun_steps = 0
+
+        return budget
+
+    def _invalidate(self, addr):
+        super()._invalidate(addr)
+
+        for entry in self._block_cells.pop(addr, ()):
+            self._blocks.pop(entry, None)
+
+    def _compile_block(self, entry):
+        instrs = []
+        ip = entry
+
+        nb_compiles = self._compile_counts.get(entry, 0) + 1
+        self._compile_counts[entry] = nb_compiles
+
+        while nb_compiles <= MAX_RECOMPILES and len(instrs) < MAX_BLOCK_SIZE:
+            instr = self._decode_at(ip)
+            if instr is None or instr.op not in _straight_ops + _terminal_ops:
+                break
+
+            instrs.append((ip, instr))
+
+            if instr.op in _terminal_ops:
+                break
+
+            ip += instr.size
+
+        if instrs:
+            end = instrs[-1][0] + len(instrs[-1][1].params) + 1
+            block = _BlockBuilder(self, entry, instrs).build()
+        else:
+            end = entry + 1
+            block = False
+
+        self._blocks[entry] = block
+        self._block_sizes[entry] = len(instrs)
+        for addr in range(entry, end):
+            self._block_cells.setdefault(addr, []).append(entry)
+            self._code.add(addr)
+
+        return block
+
+    def _decode_at(self, ip):
+        if not 0 <= ip < self._ram_size:
+            return None
+
+        saved_ip, self._ip = self._ip, ip
+        try:
+            instr = self._decoded.get(ip) or self._decode()
+        except ValueError:
+            return None
+        finally:
+            self._ip = saved_ip
+
+        if instr.parts is not None:
+            instr = instr.parts[0]
+
+        if len(instr.params) != self._instr_map[instr.op][1]:
+            return None
+
+        # Invalid modes end the block, the interpreter raising if the instruction actually runs
+        if instr.op in (Op.ADD, Op.MUL, Op.LT, Op.EQ):
+            loads, store = instr.modes[:2], instr.modes[2]
+            if store not in (0, 2):
+                return None
+        else:
+            loads = instr.modes
+
+        if any(m not in (0, 1, 2) for m in loads):
+            return None
+
+        return instr
+
+
+@lru_cache(maxsize=4096)
+def _compile_source(src):
+    # Cpus running the same program generate the same sources, so they share the compiled functions
+    namespace = {}
+    exec(compile(src, "<intcode block>", "exec"), namespace)
+
+    return namespace["block"]
+
+
+class _BlockBuilder:
+    def __init__(self, cpu, entry, instrs):
+        self._ram_size = cpu._ram_size
+        self._entry = entry
+        self._instrs = instrs
+        self._moves_rel = any(i.op == Op.REL for _, i in instrs)
+        self._uses_rel = self._moves_rel or any(2 in i.modes for _, i in instrs)
+        self._lines = []
+        # Instructions emitted so far, the current one included
+        self._nb_emitted = 0
+
+    def build(self):
+        emit = self._lines.append
+
+        emit("def block(cpu):")
+        emit("    m = cpu._intcodes")
+        emit("    code = cpu._code")
+        if self._uses_rel:
+            emit("    r = cpu._rel_offset")
+
+        for ip, instr in self._instrs:
+            self._nb_emitted += 1
+            emit(f"    # {ip}: {instr.op.name} {instr.params} {instr.modes}")
+            getattr(self, f"_emit_{instr.op.name.lower()}")(ip, instr)
+
+        if self._instrs[-1][1].op not in _branch_ops:
+            ip, instr = self._instrs[-1]
+            self._emit_exit(ip + instr.size)
+
+        return _compile_source("\n".join(self._lines))
+
+    def _load(self, param, mode, tmp):
+        if mode == 1:
+            return repr(param)
+
+        if mode == 0:
+            if param < self._ram_size:
+                return f"m[{param}]"
+
+            return f"cpu._peek({param})"
+
+        self._lines.append(f"    {tmp} = r + {param}")
+        return f"(m[{tmp}] if {tmp} < len(m) else cpu._peek({tmp}))"
+
+    def _store(self, param, mode, expr, next_ip):
+        emit = self._lines.append
+
+        emit(f"    v = {expr}")
+        if mode == 0 and param < self._ram_size:
+            addr = str(param)
+            indent = "    "
+        else:
+            addr = "a"
+            indent = "        "
+            emit(f"    a = {param}" if mode == 0 else f"    a = r + {param}")
+            emit(f"    if a >= len(m):")
+            emit(f"        cpu._poke(a, v)")
+            emit(f"    else:")
+
+        emit(f"{indent}m[{addr}] = v")
+        emit(f"{indent}if {addr} in code:")
+        emit(f"{indent}    cpu._invalidate({addr})")
+        emit(f"{indent}    if {self._entry} not in cpu._blocks:")
+
+        nb_unrun = len(self._instrs) - self._nb_emitted
+        if nb_unrun:
+            emit(f"{indent}        cpu._unrun_steps += {nb_unrun}")
+        self._emit_exit(next_ip, indent=len(indent) + 8)
+
+    def _emit_exit(self, next_ip, indent=4):
+        pad = " " * indent
+        if self._moves_rel:
+            self._lines.append(f"{pad}cpu._rel_offset = r")
+        self._lines.append(f"{pad}return {next_ip}")
+
+    def _emit_binop(self, ip, instr, fmt):
+        p1, p2, out = instr.params
+        m1, m2, m3 = instr.modes
+
+        v1 = self._load(p1, m1, "x1")
+        v2 = self._load(p2, m2, "x2")
+        self._store(out, m3, fmt.format(v1, v2), ip + instr.size)
+
+    def _emit_add(self, ip, instr):
+        self._emit_binop(ip, instr, "{} + {}")
+
+    def _emit_mul(self, ip, instr):
+        self._emit_binop(ip, instr, "{} * {}")
+
+    def _emit_lt(self, ip, instr):
+        self._emit_binop(ip, instr, "1 if {} < {} else 0")
+
+    def _emit_eq(self, ip, instr):
+        self._emit_binop(ip, instr, "1 if {} == {} else 0")
+
+    def _emit_write(self, ip, instr):
+        v = self._load(instr.params[0], instr.modes[0], "x1")
+        self._lines.append(f"    cpu._sink({v})")
+
+    def _emit_rel(self, ip, instr):
+        v = self._load(instr.params[0], instr.modes[0], "x1")
+        self._lines.append(f"    r += {v}")
+
+    def _emit_branch(self, ip, instr, cmp):
+        p1, p2 = instr.params
+        m1, m2 = instr.modes
+
+        v1 = self._load(p1, m1, "x1")
+        v2 = self._load(p2, m2, "x2")
+        if self._moves_rel:
+            self._lines.append("    cpu._rel_offset = r")
+        self._lines.append(f"    return {v2} if {v1} {cmp} 0 else {ip + 3}")
+
+    def _emit_bne(self, ip, instr):
+        self._emit_branch(ip, instr, "!=")
+
+    def _emit_beq(self, ip, instr):
+        self._emit_branch(ip, instr, "==")
@@ -0,0 +1,22 @@
+#! /usr/bin/env python
+
+
+class Controller:
+    """
+    Drives an IntCodeCPU in a closed loop, see IntCodeCPU.drive().
+
+    The controller is called from within the READ instruction, so that the cpu doesn't have to return from run()
+    and be run again for every input.
+    """
+
+    def next_input(self, cpu, output):
+        """
+        Return the value the program reads, given what it output since the previous call.
+
+        Returning None pauses the cpu, drive() then returns WAITING_ON_INPUT.
+        """
+        return None
+
+    def on_halt(self, cpu, output):
+        """Called once the program halts, with what it output since the last input."""
+        pass
@@ -0,0 +1,762 @@
+#! /usr/bin/env python
+
+import os
+from array import array
+from collections import deque, namedtuple
+from enum import Enum, IntEnum
+from time import perf_counter
+
+from aoc.intcode.codec import read_int, read_ints, write_int, write_ints
+from aoc.intcode.memory import PagedMemory
+from aoc.intcode.tracing import PrintTracer
+
+_debug = os.getenv("DEBUG", "") != ""
+
+
+def dbgprint(*args, **kwargs):
+    if not _debug:
+        return
+
+    print(*args, **kwargs)
+
+
+class Op(IntEnum):
+    ADD = 1
+    MUL = 2
+    READ = 3
+    WRITE = 4
+    BNE = 5
+    BEQ = 6
+    LT = 7
+    EQ = 8
+    REL = 9
+    HALT = 99
+
+
+# Fused instructions keep the op, modes and params of their first part, with `parts` set to the decoded pair
+DecodedInstr = namedtuple("DecodedInstr", "op handler modes params size parts", defaults=(None,))
+
+DriveStats = namedtuple("DriveStats", "steps elapsed steps_per_second")
+
+Snapshot = namedtuple("Snapshot", "memory far_memory dense_limit ip rel_offset halted input output")
+
+# How far past the program the dense memory can grow. Addresses further than that go to the far memory.
+DENSE_RAM_MARGIN = 1 << 16
+
+# Pairs of instructions fused into one, first op: second ops
+_fusable_pairs = {
+    Op.ADD: (Op.REL,),
+    Op.LT: (Op.BNE, Op.BEQ),
+    Op.EQ: (Op.BNE, Op.BEQ),
+}
+
+# Start of the checkpoints written by save()
+_CHECKPOINT_MAGIC = b"ICCP\x02"
+
+# Methods that can modify the memory in place, and must copy it first while it's shared
+_memory_writers = ("poke", "_poke", "_extend_ram_to")
+
+
+class IntCodeCPU:
+    def __init__(
+        self, program, id_=0, tracer=None, far_memory=None, typed_memory=False, output=None, output_limit=None
+    ):
+        """
+        `output` is a callable receiving every value written, instead of buffering them for pop_output().
+        With `output_limit`, run() returns OUTPUT_READY as soon as that many values are buffered.
+        """
+        if isinstance(program, str):
+            program = [int(i) for i in program.split(",")]
+        elif isinstance(program, tuple):
+            # Program images are shared, run a copy
+            program = list(program)
+
+        self._intcodes = program
+        self._typed_memory = typed_memory
+        if typed_memory and not isinstance(program, memoryview):
+            # Machine ints instead of python ones, until a value doesn't fit
+            try:
+                self._intcodes = array("q", program)
+            except OverflowError:
+                pass
+
+        self._id = id_
+
+        self._input = deque()
+        self._output = []
+        self._output_sink = output
+        self._sink = output if output is not None else self._buffer_output
+        self._output_limit = output_limit or float("inf")
+
+        self._ip = 0
+        self._rel_offset = 0
+        self._ram_size = len(self._intcodes)
+        self._dense_limit = self._ram_size + DENSE_RAM_MARGIN
+        self._far = far_memory if far_memory is not None else PagedMemory()
+        self._halted = False
+        self._shared_memory = False
+        if isinstance(program, memoryview):
+            # Attached shared images are read-only, run them in place until the first write
+            self._share_memory()
+
+        # Set while drive() runs. Steps are the inputs given by controllers.
+        self._controller = None
+        self._drive_steps = 0
+        self._drive_elapsed = 0.0
+        self._drive_start = None
+
+        # Decoded instructions, keyed by address, and every address covered by one of them.
+        self._decoded = {}
+        self._code = set()
+        # Address of the second part of a fused instruction: address of the fused instruction
+        self._fused_at = {}
+
+        # op: (handler, number of params, ip increment)
+        self._instr_map = {
+            Op.ADD: (self.add, 3, 4),
+            Op.MUL: (self.mul, 3, 4),
+            Op.READ: (self.read, 1, 2),
+            Op.WRITE: (self.write, 1, 2),
+            Op.BNE: (self.bne, 2, 0),
+            Op.BEQ: (self.beq, 2, 0),
+            Op.LT: (self.lt, 3, 4),
+            Op.EQ: (self.eq, 3, 4),
+            Op.REL: (self.rel, 1, 2),
+            Op.HALT: (self.halt, 0, 0),
+        }
+
+        if tracer is None and _debug:
+            tracer = PrintTracer()
+
+        self._tracer = tracer
+        if tracer is not None:
+            self._attach_tracer(tracer)
+
+    def run(self, input_=None, max_steps=None):
+        """
+        Run until the program halts, returning None, or gets interrupted, returning the InterruptCode.
+
+        `input_` is queued after any input sent but not read yet. With `max_steps`, the run is interrupted with
+        BUDGET_EXHAUSTED after executing that many instructions, and can be resumed by running again.
+        """
+        if input_:
+            self._input.extend(input_)
+
+        if self._halted:
+            return None
+
+        if max_steps is not None:
+            return self._run_budgeted(max_steps)
+
+        decoded = self._decoded
+
+        # Handlers report control events by returning their code, there's nothing else to check per instruction
+        while True:
+            instr = decoded.get(self._ip)
+            if instr is None:
+                instr = self._decode()
+
+            # Handlers returning an interrupt have already left the ip where to resume
+            interrupt = instr.handler(instr)
+            if interrupt is not None:
+                return None if interrupt is _HALTED else interrupt
+
+            self._ip += instr.size
+
+    def _run_budgeted(self, max_steps):
+        decoded = self._decoded
+
+        for _ in range(max_steps):
+            instr = decoded.get(self._ip)
+            if instr is None:
+                instr = self._decode()
+
+            # Fused instructions are run one part at a time, so that every instruction counts
+            if instr.parts is not None:
+                instr = instr.parts[0]
+
+            interrupt = instr.handler(instr)
+            if interrupt is not None:
+                return None if interrupt is _HALTED else interrupt
+
+            self._ip += instr.size
+
+        return InterruptCode.BUDGET_EXHAUSTED
+
+    def run_until_outputs(self, n, input_=None, max_steps=None):
+        """
+        Same as run(), also interrupting with OUTPUT_READY once `n` more values are buffered.
+
+        Raises ValueError for cpus with an output sink, that never buffer anything.
+        """
+        if self._output_sink is not None:
+            raise ValueError("Output is sent to a sink, not buffered")
+
+        limit = self._output_limit
+        self._output_limit = min(limit, len(self._output) + n)
+
+        try:
+            return self.run(input_, max_steps)
+        finally:
+            self._output_limit = limit
+
+    def frames(self, size, input_=None):
+        """
+        Run, yielding the buffered output as tuples of `size` values as soon as they are complete.
+
+        Stops when the program halts or waits on input, leaving any incomplete frame buffered. Like
+        run_until_outputs(), raises ValueError for cpus with an output sink.
+        """
+        if input_:
+            self._input.extend(input_)
+
+        output = self._output
+        while True:
+            while len(output) >= size:
+                frame = tuple(output[:size])
+                del output[:size]
+                yield frame
+
+            if self.run_until_outputs(size - len(output)) != InterruptCode.OUTPUT_READY:
+                return
+
+            output = self._output
+
+    def drive(self, controller, max_steps=None):
+        """
+        Run with `controller` giving the input, from within the READ, whenever the program needs some.
+
+        Input queued beforehand is read first. Returns None once the program halts, after calling the controller's
+        on_halt(), or the InterruptCode it got interrupted with, as run() does.
+        """
+        self._controller = controller
+        self._drive_start = perf_counter()
+
+        try:
+            interrupt = self.run(max_steps=max_steps)
+        finally:
+            self._drive_elapsed += perf_counter() - self._drive_start
+            self._drive_start = None
+            self._controller = None
+
+        if interrupt is None:
+            controller.on_halt(self, self.pop_output())
+
+        return interrupt
+
+    @property
+    def drive_stats(self):
+        """Inputs given by controllers, and time spent driven, including the drive() in progress if any."""
+        elapsed = self._drive_elapsed
+        if self._drive_start is not None:
+            elapsed += perf_counter() - self._drive_start
+
+        return DriveStats(self._drive_steps, elapsed, self._drive_steps / elapsed if elapsed else 0.0)
+
+    def _attach_tracer(self, tracer):
+        # Tracing is done by wrapping the handlers, so that untraced cpus run the plain ones
+        def traced(handler):
+            def _handler(instr):
+                tracer.on_instr(self, self._ip, instr)
+                return handler(instr)
+
+            return _handler
+
+        def traced_read(instr):
+            tracer.on_instr(self, self._ip, instr)
+            interrupt = read(instr)
+            if interrupt is not None:
+                return interrupt
+
+            (out,) = instr.params
+            addr = out + self._rel_offset if instr.modes[0] == 2 else out
+            tracer.on_input(self, self._peek(addr))
+
+        def traced_sink(v):
+            sink(v)
+            tracer.on_output(self, v)
+
+        def traced_ld(addr, mode):
+            v = ld(addr, mode)
+            tracer.on_load(self, addr, mode, v)
+            return v
+
+        def traced_st(addr, v, mode):
+            st(addr, v, mode)
+            tracer.on_store(self, addr, mode, v)
+
+        read, sink, ld, st = self.read, self._sink, self._ld, self._st
+
+        for op, (handler, nb_params, size) in self._instr_map.items():
+            if op == Op.READ:
+                handler = traced_read
+            else:
+                handler = traced(handler)
+
+            self._instr_map[op] = (handler, nb_params, size)
+
+        self._sink = traced_sink
+        self._ld = traced_ld
+        self._st = traced_st
+
+    def is_halted(self):
+        return self._halted
+
+    def _get_instruction(self):
+        op = self._intcodes[self._ip]
+        opcode = op % 100
+        modes = []
+
+        op //= 100
+
+        while op > 0:
+            modes.append(op % 10)
+            op //= 10
+
+        return opcode, modes
+
+    def _get_op_params(self, n):
+        return self._intcodes[self._ip + 1 : self._ip + 1 + n]
+
+    def _decode(self):
+        """Decode the instruction at the current ip once and cache it until its code gets overwritten."""
+        ip = self._ip
+        opcode, modes = self._get_instruction()
+
+        try:
+            handler, nb_params, size = self._instr_map[opcode]
+        except KeyError:
+            dbgprint(f"IP: ip: {ip}, instr={opcode}, mode={modes}, ERROR")
+            dbgprint(self._intcodes)
+            raise ValueError(f"Unsupported instr: {opcode}")
+
+        modes = tuple(modes[:nb_params]) + (0,) * (nb_params - len(modes))
+        params = tuple(self._get_op_params(nb_params))
+
+        instr = DecodedInstr(Op(opcode), handler, modes, params, size)
+        self._decoded[ip] = instr
+        self._code.update(range(ip, ip + nb_params + 1))
+
+        # Traced cpus must see every instruction
+        if instr.op in _fusable_pairs and self._tracer is None:
+            instr = self._fuse(ip, instr)
+
+        return instr
+
+    def _fuse(self, ip, first):
+        """Fuse `first` with the instruction following it, if they form a known pair, caching the fused one."""
+        next_ip = ip + first.size
+        if not 0 <= next_ip < self._ram_size or self._intcodes[next_ip] % 100 not in _fusable_pairs[first.op]:
+            return first
+
+        saved_ip, self._ip = self._ip, next_ip
+        try:
+            second = self._decoded.get(next_ip) or self._decode()
+        finally:
+            self._ip = saved_ip
+
+        if first.op == Op.ADD:
+            handler = self._add_and_rel
+        elif first.modes[2] == second.modes[0] and first.params[2] == second.params[0]:
+            # The branch tests the cell the comparison was stored to
+            handler = self._lt_and_branch if first.op == Op.LT else self._eq_and_branch
+        else:
+            return first
+
+        fused = DecodedInstr(first.op, handler, first.modes, first.params, 0, (first, second))
+        self._decoded[ip] = fused
+        self._fused_at[next_ip] = ip
+
+        return fused
+
+    def _invalidate(self, addr):
+        # Instructions are at most 4 cells long, so only these can cover `addr`
+        decoded = self._decoded
+        for ip in range(addr - 3, addr + 1):
+            instr = decoded.get(ip)
+            if instr is not None and ip + len(instr.params) >= addr:
+                del decoded[ip]
+
+                # An instruction fused with the one overwritten must be decoded again too
+                head = self._fused_at.pop(ip, None)
+                if head is not None:
+                    decoded.pop(head, None)
+
+    def add(self, instr):
+        p1, p2, out = instr.params
+        m1, m2, m3 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+        self._st(out, v1 + v2, m3)
+
+    def mul(self, instr):
+        p1, p2, out = instr.params
+        m1, m2, m3 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+        self._st(out, v1 * v2, m3)
+
+    def read(self, instr):
+        (out,) = instr.params
+
+        if not self._input:
+            if self._controller is None:
+                return InterruptCode.WAITING_ON_INPUT
+
+            v = self._controller.next_input(self, self.pop_output())
+            if v is None:
+                return InterruptCode.WAITING_ON_INPUT
+
+            self._drive_steps += 1
+            self._input.append(v)
+
+        self._st(out, self._input.popleft(), instr.modes[0])
+
+    def write(self, instr):
+        (p,) = instr.params
+
+        v = self._ld(p, instr.modes[0])
+        self._sink(v)
+
+        if len(self._output) >= self._output_limit:
+            self._ip += instr.size
+            return InterruptCode.OUTPUT_READY
+
+    def bne(self, instr):
+        p1, p2 = instr.params
+        m1, m2 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+
+        if v1 != 0:
+            self._ip = v2
+        else:
+            self._ip += 3
+
+    def beq(self, instr):
+        p1, p2 = instr.params
+        m1, m2 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+
+        if v1 == 0:
+            self._ip = v2
+        else:
+            self._ip += 3
+
+    def lt(self, instr):
+        p1, p2, out = instr.params
+        m1, m2, m3 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+
+        if v1 < v2:
+            self._st(out, 1, m3)
+        else:
+            self._st(out, 0, m3)
+
+    def eq(self, instr):
+        p1, p2, out = instr.params
+        m1, m2, m3 = instr.modes
+
+        v1 = self._ld(p1, m1)
+        v2 = self._ld(p2, m2)
+
+        if v1 == v2:
+            self._st(out, 1, m3)
+        else:
+            self._st(out, 0, m3)
+
+    def rel(self, instr):
+        (p,) = instr.params
+
+        v = self._ld(p, instr.modes[0])
+
+        self._rel_offset += v
+
+    def halt(self, instr):
+        self._halted = True
+        return _HALTED
+
+    def _lt_and_branch(self, instr):
+        p1, p2, _ = instr.params
+        m1, m2, _ = instr.modes
+
+        self._branch_on(instr, 1 if self._ld(p1, m1) < self._ld(p2, m2) else 0)
+
+    def _eq_and_branch(self, instr):
+        p1, p2, _ = instr.params
+        m1, m2, _ = instr.modes
+
+        self._branch_on(instr, 1 if self._ld(p1, m1) == self._ld(p2, m2) else 0)
+
+    def _branch_on(self, instr, v):
+        cmp, branch = instr.parts
+        ip = self._ip
+
+        self._st(cmp.params[2], v, cmp.modes[2])
+        if self._decoded.get(ip) is not instr:
+            # The store overwrote the pair, whatever comes next must be decoded again
+            self._ip = ip + cmp.size
+            return
+
+        # The branch tests the cell just stored to
+        if (v != 0) == (branch.op == Op.BNE):
+            self._ip = self._ld(branch.params[1], branch.modes[1])
+        else:
+            self._ip = ip + cmp.size + 3
+
+    def _add_and_rel(self, instr):
+        add, rel = instr.parts
+        ip = self._ip
+
+        self.add(add)
+        if self._decoded.get(ip) is not instr:
+            self._ip = ip + add.size
+            return
+
+        self._rel_offset += self._ld(rel.params[0], rel.modes[0])
+        self._ip = ip + add.size + 2
+
+    def peek(self, idx):
+        return self._intcodes[idx]
+
+    def poke(self, idx, v):
+        try:
+            self._intcodes[idx] = v
+        except OverflowError:
+            self._promote_memory()
+            self._intcodes[idx] = v
+
+        if idx in self._code:
+            self._invalidate(idx)
+
+    def send(self, *values):
+        """Queue input for the program, to be read on the next run()."""
+        self._input.extend(values)
+
+    def pop_output(self):
+        output = self._output
+        self._output = []
+        return output
+
+    def _buffer_output(self, v):
+        self._output.append(v)
+
+    def snapshot(self):
+        """
+        Capture the cpu state. The memory is shared with the cpu until one of them writes to it.
+
+        The first write then copies the whole dense memory, not just the page written to. Programs are small enough
+        for that copy to be cheaper than indexing every access through pages.
+        """
+        self._share_memory()
+
+        return self._state(self._far.copy())
+
+    def _state(self, far_memory):
+        return Snapshot(
+            self._intcodes,
+            far_memory,
+            self._dense_limit,
+            self._ip,
+            self._rel_offset,
+            self._halted,
+            tuple(self._input),
+            tuple(self._output),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, id_=0, **kwargs):
+        cpu = cls(snapshot.memory, id_, far_memory=snapshot.far_memory.copy(), **kwargs)
+        cpu._share_memory()
+
+        # Recomputed from the grown memory, it would shadow the far cells in between
+        cpu._dense_limit = snapshot.dense_limit
+        cpu._ip = snapshot.ip
+        cpu._rel_offset = snapshot.rel_offset
+        cpu._halted = snapshot.halted
+        cpu._input.extend(snapshot.input)
+        cpu._output = list(snapshot.output)
+
+        return cpu
+
+    def fork(self, id_=None):
+        return self.from_snapshot(
+            self.snapshot(),
+            self._id if id_ is None else id_,
+            tracer=self._tracer,
+            output=self._output_sink,
+            output_limit=self._output_limit,
+        )
+
+    def save(self, file):
+        """
+        Write a compact binary checkpoint of the cpu state to `file`, opened in binary mode.
+
+        Checkpoints can follow each other in the same file, load() reading them back one at a time.
+        """
+        # Written right away, so the memory doesn't have to be shared
+        write_snapshot(file, self._state(self._far))
+
+    @classmethod
+    def load(cls, file, id_=0, **kwargs):
+        """Create a cpu from the next checkpoint of `file`, written by save()."""
+        cpu = cls.from_snapshot(read_snapshot(file), id_, **kwargs)
+        # The memory was read for this cpu only
+        cpu._set_memory_private()
+
+        return cpu
+
+    def _share_memory(self):
+        if self._shared_memory:
+            return
+
+        # Shadow the writers with versions that first get a private copy of the memory
+        def copy_first(method):
+            def _method(*args):
+                self._unshare_memory()
+                return method(self, *args)
+
+            return _method
+
+        for name in _memory_writers:
+            setattr(self, name, copy_first(getattr(type(self), name)))
+
+        self._shared_memory = True
+
+    def _unshare_memory(self):
+        if not self._shared_memory:
+            return
+
+        memory = self._intcodes
+        if isinstance(memory, memoryview):
+            # Copied to the memory the cpu would have had with a program of its own
+            self._intcodes = array("q", memory.tobytes()) if self._typed_memory else memory.tolist()
+        else:
+            self._intcodes = memory[:]
+
+        self._set_memory_private()
+
+    def _promote_memory(self):
+        """Replace a typed memory by a list, when a value doesn't fit in 64 bits."""
+        if isinstance(self._intcodes, list):
+            return
+
+        self._intcodes = list(self._intcodes)
+        self._set_memory_private()
+
+    def _set_memory_private(self):
+        if not self._shared_memory:
+            return
+
+        for name in _memory_writers:
+            delattr(self, name)
+
+        self._shared_memory = False
+
+    def _ld(self, addr, mode):
+        if mode == 0:
+            return self._peek(addr)
+        elif mode == 1:
+            return addr
+        elif mode == 2:
+            return self._peek(addr + self._rel_offset)
+        else:
+            raise ValueError(f"Unsupported mode: {mode}")
+
+    def _st(self, addr, v, mode):
+        if mode == 0:
+            self._poke(addr, v)
+        elif mode == 2:
+            self._poke(addr + self._rel_offset, v)
+        else:
+            raise ValueError(f"Unsupported mode: {mode}")
+
+    def _peek(self, addr):
+        if addr >= self._ram_size:
+            # Nothing was ever written there if it's part of the dense memory
+            return self._far.peek(addr)
+
+        return self._intcodes[addr]
+
+    def _poke(self, addr, v):
+        if addr >= self._ram_size:
+            if addr >= self._dense_limit:
+                self._far.poke(addr, v)
+                return
+
+            self._extend_ram_to(addr)
+
+        try:
+            self._intcodes[addr] = v
+        except OverflowError:
+            self._promote_memory()
+            self._intcodes[addr] = v
+
+        if addr in self._code:
+            self._invalidate(addr)
+
+    def _extend_ram_to(self, addr):
+        ram_needed = addr + 1 - self._ram_size
+
+        self._intcodes.extend([0] * ram_needed)
+        self._ram_size += ram_needed
+
+    def __repr__(self):
+        return f"{type(self).__name__}<{self._id}>"
+
+
+class InterruptCode(Enum):
+    WAITING_ON_INPUT = 1
+    OUTPUT_READY = 2
+    BUDGET_EXHAUSTED = 3
+
+
+# Returned by the HALT handler to stop run(), which returns None for it
+_HALTED = object()
+
+
+def write_snapshot(file, snapshot):
+    """Write `snapshot` to `file`, opened in binary mode, as a compact binary checkpoint."""
+    far = snapshot.far_memory
+    pages = sorted(far.pages())
+
+    header = [snapshot.ip, snapshot.rel_offset, int(snapshot.halted), snapshot.dense_limit, far.page_size, len(pages)]
+
+    file.write(_CHECKPOINT_MAGIC)
+    write_ints(file, header)
+    write_ints(file, snapshot.memory)
+    for page_no, values in pages:
+        write_int(file, page_no)
+        write_ints(file, values)
+
+    write_ints(file, snapshot.input)
+    write_ints(file, snapshot.output)
+
+
+def read_snapshot(file):
+    """Read the next checkpoint of `file`, written by write_snapshot(), raising EOFError if there's none left."""
+    magic = file.read(len(_CHECKPOINT_MAGIC))
+    if not magic:
+        raise EOFError("No more checkpoints")
+    if magic != _CHECKPOINT_MAGIC:
+        raise ValueError("Not an Intcode checkpoint")
+
+    ip, rel_offset, halted, dense_limit, page_size, nb_pages = read_ints(file)
+    memory = read_ints(file)
+
+    far = PagedMemory(page_size)
+    for _ in range(nb_pages):
+        page_no = read_int(file)
+        far.set_page(page_no, read_ints(file))
+
+    input_ = tuple(read_ints(file))
+    output = tuple(read_ints(file))
+
+    return Snapshot(memory, far, dense_limit, ip, rel_offset, bool(halted), input_, output)
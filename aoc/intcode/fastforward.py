@@ -0,0 +1,311 @@
+#! /usr/bin/env python
+from collections import namedtuple
+
+from aoc.intcode.cpu import IntCodeCPU, Op
+
+# Backward branches taken before their loop gets analyzed
+HOT_LOOP_THRESHOLD = 16
+
+# Analyses of a loop, invalidated by writes to its code, before giving up on it
+MAX_ANALYSES = 4
+
+# Loop with a straight-line body, from `head` to the branch at `branch_ip`, whose iterations only add the same
+# amount to some cells. Cells are (mode, param) pairs, resolved against the relative base when fast-forwarding.
+#   inductions: cell: increment per iteration, as an affine expression of the invariant cells
+#   condition: affine expression of the cells at the start of an iteration, compared to 0 by `relation` to decide
+#              whether the loop goes on
+#   cells: every cell the body accesses
+LoopSummary = namedtuple("LoopSummary", "head branch_ip nb_instrs inductions condition relation cells")
+
+_Flag = namedtuple("_Flag", "op diff")
+
+_arith_ops = (Op.ADD, Op.MUL, Op.LT, Op.EQ)
+
+
+class FastForwardIntCodeCPU(IntCodeCPU):
+    """
+    Interpreter skipping the iterations of counted loops.
+
+    Loops whose backward branch gets hot are analyzed once. If every iteration provably adds the same amounts to
+    the same cells, and the loop condition is affine in them, the cpu computes how many iterations are left and
+    jumps to the state before the last one, which is then run normally. Anything else, including I/O, relative
+    base changes, or cells aliasing each other or the loop's code, falls back to plain interpretation.
+
+    Skipped instructions are reported to the tracer through on_skip(). Runs with `max_steps` don't skip anything,
+    so that budgets still count exact instructions.
+    """
+
+    def __init__(self, program, id_=0, **kwargs):
+        super().__init__(program, id_, **kwargs)
+
+        self._fast_forwarding = True
+
+        # branch ip: number of times taken, then LoopSummary, or False if the loop can't be fast-forwarded
+        self._loop_hits = {}
+        self._loops = {}
+        # branch ip: number of times its loop was analyzed
+        self._analyses = {}
+        # address: branch ips of the loops whose code covers it
+        self._loop_cells = {}
+
+    def run(self, input_=None, max_steps=None):
+        self._fast_forwarding = max_steps is None
+        return super().run(input_, max_steps)
+
+    def _decode(self):
+        ip = self._ip
+        instr = super()._decode()
+
+        # Only backward branches get watched, anything else runs the plain handlers
+        if instr.parts is not None:
+            branch, branch_ip = instr.parts[1], ip + instr.parts[0].size
+        else:
+            branch, branch_ip = instr, ip
+
+        if branch.op not in (Op.BNE, Op.BEQ) or branch.modes[1] != 1 or branch.params[1] >= branch_ip:
+            return instr
+        if self._loops.get(branch_ip) is False:
+            return instr
+
+        instr = instr._replace(handler=self._watch(instr.handler, branch_ip))
+        self._decoded[ip] = instr
+
+        return instr
+
+    def _watch(self, handler, branch_ip):
+        def _handler(instr):
+            handler(instr)
+
+            if self._ip < branch_ip and self._fast_forwarding:
+                self._back_edge(branch_ip)
+
+        return _handler
+
+    def _back_edge(self, branch_ip):
+        summary = self._loops.get(branch_ip)
+        if summary is None:
+            nb_hits = self._loop_hits.get(branch_ip, 0) + 1
+            if nb_hits < HOT_LOOP_THRESHOLD:
+                self._loop_hits[branch_ip] = nb_hits
+                return
+
+            summary = self._summarize(self._ip, branch_ip)
+
+        if summary:
+            self._fast_forward(summary)
+
+    def _summarize(self, head, branch_ip):
+        nb_analyses = self._analyses.get(branch_ip, 0) + 1
+        self._analyses[branch_ip] = nb_analyses
+        self._loop_hits.pop(branch_ip, None)
+
+        # Loops whose code keeps changing are left alone
+        summary = nb_analyses <= MAX_ANALYSES and summarize_loop(self._peek, head, branch_ip)
+        if not summary:
+            self._loops[branch_ip] = False
+
+            # Decoded again with their plain handlers
+            self._decoded.pop(branch_ip, None)
+            self._decoded.pop(self._fused_at.get(branch_ip), None)
+
+            return False
+
+        self._loops[branch_ip] = summary
+        for addr in range(head, branch_ip + 3):
+            self._loop_cells.setdefault(addr, set()).add(branch_ip)
+            self._code.add(addr)
+
+        return summary
+
+    def _invalidate(self, addr):
+        super()._invalidate(addr)
+
+        for branch_ip in self._loop_cells.pop(addr, ()):
+            self._loops.pop(branch_ip, None)
+
+    def _fast_forward(self, summary):
+        addrs = {}
+        for cell in summary.cells:
+            mode, param = cell
+            addrs[cell] = param + self._rel_offset if mode == 2 else param
+
+        # Cells must be distinct, and the loop must not read or write its own code
+        if len(set(addrs.values())) != len(addrs):
+            return
+        if any(a < 0 or summary.head <= a < summary.branch_ip + 3 for a in addrs.values()):
+            return
+
+        values = {cell: self._peek(addr) for cell, addr in addrs.items()}
+
+        increments = {cell: _evaluate(e, values) for cell, e in summary.inductions.items()}
+        a = _evaluate(summary.condition, values)
+        b = sum(c * increments.get(cell, 0) for cell, c in summary.condition.items() if cell is not None)
+
+        # Iterations that can be skipped, the last one is left to run normally
+        n = _exit_iteration(a, b, summary.relation)
+        if not n:
+            return
+
+        for cell, inc in increments.items():
+            self._poke(addrs[cell], values[cell] + n * inc)
+
+        if self._tracer is not None:
+            self._tracer.on_skip(self, summary.head, n * summary.nb_instrs)
+
+
+def summarize_loop(peek, head, branch_ip):
+    """
+    Analyze the loop from `head` to the branch at `branch_ip`, reading the code through `peek`.
+
+    Returns a LoopSummary, or None if the loop doesn't have a straight-line body made of arithmetic and comparisons
+    only, with cells either invariant or incremented by an invariant amount, and an exit condition affine in them.
+    """
+    state = {}
+    live_in = set()
+    cells = set()
+
+    def load(param, mode):
+        if mode == 1:
+            return _const(param)
+        if mode not in (0, 2):
+            return None
+
+        cell = (mode, param)
+        cells.add(cell)
+        if cell not in state:
+            live_in.add(cell)
+            return {cell: 1}
+
+        return state[cell]
+
+    def store(param, mode, v):
+        if mode not in (0, 2):
+            return False
+
+        cells.add((mode, param))
+        state[mode, param] = v
+        return True
+
+    ip = head
+    nb_instrs = 0
+    while ip < branch_ip:
+        op, modes = _decode(peek(ip))
+        if op not in _arith_ops:
+            return None
+
+        p1, p2, out = peek(ip + 1), peek(ip + 2), peek(ip + 3)
+        v1, v2 = load(p1, modes[0]), load(p2, modes[1])
+        if v1 is None or v2 is None or isinstance(v1, _Flag) or isinstance(v2, _Flag):
+            return None
+
+        if op == Op.ADD:
+            v = _add(v1, v2)
+        elif op == Op.MUL:
+            v = _mul(v1, v2)
+        else:
+            v = _Flag(op, _add(v1, _scale(v2, -1)))
+
+        if v is None or not store(out, modes[2], v):
+            return None
+
+        ip += 4
+        nb_instrs += 1
+
+    op, modes = _decode(peek(ip))
+    if ip != branch_ip or op not in (Op.BNE, Op.BEQ) or modes[1] != 1 or peek(ip + 2) != head:
+        return None
+
+    v = load(peek(ip + 1), modes[0])
+    if v is None:
+        return None
+
+    # The relation, between the condition and 0, for which the loop goes on
+    if isinstance(v, _Flag):
+        condition = v.diff
+        if v.op == Op.LT:
+            relation = "<" if op == Op.BNE else ">="
+        else:
+            relation = "==" if op == Op.BNE else "!="
+    else:
+        condition = v
+        relation = "!=" if op == Op.BNE else "=="
+
+    written = set(state)
+    inductions = {}
+    for cell in live_in & written:
+        v = state[cell]
+        if isinstance(v, _Flag) or v.get(cell) != 1:
+            return None
+
+        increment = _add(v, {cell: -1})
+        if any(c is not None and c in written for c in increment):
+            return None
+
+        inductions[cell] = increment
+
+    return LoopSummary(head, branch_ip, nb_instrs + 1, inductions, condition, relation, frozenset(cells))
+
+
+def _decode(instr):
+    return instr % 100, (instr // 100 % 10, instr // 1000 % 10, instr // 10000 % 10)
+
+
+# Affine expressions are dicts of cell: coefficient, with the constant term under None
+
+
+def _const(v):
+    return {None: v} if v else {}
+
+
+def _add(a, b):
+    r = dict(a)
+    for cell, c in b.items():
+        c += r.get(cell, 0)
+        if c:
+            r[cell] = c
+        else:
+            r.pop(cell, None)
+
+    return r
+
+
+def _scale(a, n):
+    return {cell: c * n for cell, c in a.items()} if n else {}
+
+
+def _mul(a, b):
+    # Affine as long as one side is a constant
+    if not a.keys() - {None}:
+        return _scale(b, a.get(None, 0))
+    if not b.keys() - {None}:
+        return _scale(a, b.get(None, 0))
+
+    return None
+
+
+def _evaluate(e, values):
+    return sum(c if cell is None else c * values[cell] for cell, c in e.items())
+
+
+def _exit_iteration(a, b, relation):
+    """
+    First iteration k >= 0 for which `a + b * k` doesn't satisfy `relation` with 0, None if there is none.
+    """
+    if relation == "<":
+        if a >= 0:
+            return 0
+        return (-a + b - 1) // b if b > 0 else None
+    if relation == ">=":
+        if a < 0:
+            return 0
+        return a // -b + 1 if b < 0 else None
+    if relation == "!=":
+        if a == 0:
+            return 0
+        return -a // b if b and -a % b == 0 and -a // b > 0 else None
+    if relation == "==":
+        if a != 0:
+            return 0
+        return 1 if b else None
+
+    raise ValueError(f"Unsupported relation: {relation}")
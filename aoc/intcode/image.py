@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+import os
+import struct
+from array import array
+
+# Suffix of the binary images cached next to the program files
+IMAGE_SUFFIX = ".img"
+
+# Modification time and size of the program file an image was made from
+_header = struct.Struct("<qq")
+
+# Images already loaded by this process, keyed by path
+_images = {}
+
+
+def parse_program(program):
+    """Parse a program into an image, a tuple that cpus copy instead of modifying."""
+    if isinstance(program, str):
+        return tuple(int(i) for i in program.split(","))
+
+    return tuple(program)
+
+
+def load_program(path):
+    """
+    Load the image of a program file.
+
+    The parsed program is cached in a binary sidecar file, made of int64 values, that is used as long as the
+    program file's modification time and size don't change. Programs with values that don't fit an int64 are
+    parsed every time.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+
+    cached = _images.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    image_path = path + IMAGE_SUFFIX
+
+    image = _read_image(image_path, key)
+    if image is None:
+        with open(path) as f:
+            image = parse_program(f.read().strip())
+
+        _write_image(image_path, key, image)
+
+    _images[path] = (key, image)
+
+    return image
+
+
+def _read_image(path, key):
+    try:
+        with open(path, "rb") as f:
+            if _header.unpack(f.read(_header.size)) != key:
+                return None
+
+            values = array("q")
+            values.frombytes(f.read())
+    except (OSError, struct.error, ValueError):
+        return None
+
+    return tuple(values)
+
+
+def _write_image(path, key, image):
+    try:
+        values = array("q", image)
+    except OverflowError:
+        return
+
+    # Written aside then moved in place, so that concurrent loads never read a partial image
+    tmp_path = f"{path}.{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_header.pack(*key))
+            values.tofile(f)
+
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,144 @@
+#! /usr/bin/env python
+from collections import OrderedDict, namedtuple
+from itertools import count
+
+from aoc.intcode.cpu import IntCodeCPU
+from aoc.intcode.image import parse_program
+
+DEFAULT_MAXSIZE = 4096
+
+# Cpus kept running, for the most recently cached states
+DEFAULT_MAX_LIVE = 16
+
+RunResult = namedtuple("RunResult", "output halted")
+MemoStats = namedtuple("MemoStats", "hits misses resumed")
+
+
+class MemoizedRunner:
+    """
+    Run deterministic programs as pure functions of their input, with a bounded LRU cache of the results.
+
+    Results are keyed by program image and input sequence. The cpu state after each input is cached too, so
+    that a run whose input extends a cached one resumes from there instead of starting over. The cpus that left the
+    `max_live` most recent states are kept, and the first run extending one of them goes on with that cpu, decoded
+    instructions included. Other states are snapshots, that resumed runs rebuild a cpu from.
+
+    Programs are parsed only when they change from one run to the next, so they must not be modified once run.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, cpu_class=IntCodeCPU, max_live=DEFAULT_MAX_LIVE):
+        self._maxsize = maxsize
+        self._max_live = max_live
+        self._cpu_class = cpu_class
+        self._cache = OrderedDict()
+        # Entries still holding the cpu that left their state, oldest first
+        self._live = OrderedDict()
+
+        # image: id, standing for the image in the cache keys so that they're cheap to hash
+        self._image_ids = {}
+        # id: [image, number of cache entries keyed on it], the image being dropped once no entry is left
+        self._image_refs = {}
+        self._next_image_id = count()
+        # Program of the last run, with its image id and image
+        self._program = (None, None, None)
+
+        self._hits = 0
+        self._misses = 0
+        self._resumed = 0
+
+    @property
+    def stats(self):
+        return MemoStats(self._hits, self._misses, self._resumed)
+
+    def run(self, program, inputs):
+        """Return all the output of `program` after being given `inputs`, one at a time, and whether it halted."""
+        image_id, image = self._image(program)
+        inputs = tuple(inputs)
+
+        entry = self._get((image_id, inputs))
+        if entry is not None:
+            self._hits += 1
+            return entry[0]
+
+        self._misses += 1
+
+        # The state cached for a prefix is the one the cpu is left in once it needs more input, or has halted
+        for n in range(len(inputs) - 1, -1, -1):
+            entry = self._get((image_id, inputs[:n]))
+            if entry is not None:
+                self._resumed += 1
+                break
+        else:
+            n = 0
+            entry = self._step(self._cpu_class(image), (image_id, ()), ())
+
+        for i in range(n, len(inputs)):
+            entry = self._step(self._take_cpu(entry), (image_id, inputs[: i + 1]), entry[0].output, inputs[i])
+
+        return entry[0]
+
+    def _image(self, program):
+        last_program, image_id, image = self._program
+        if program is last_program and image_id in self._image_refs:
+            return image_id, image
+
+        if program is not last_program:
+            image = parse_program(program)
+
+        image_id = self._image_ids.get(image)
+        if image_id is None:
+            image_id = next(self._next_image_id)
+            self._image_ids[image] = image_id
+            self._image_refs[image_id] = [image, 0]
+
+        self._program = (program, image_id, image)
+
+        return image_id, image
+
+    def _step(self, cpu, key, output, *input_):
+        cpu.run(input_)
+
+        # [result, snapshot, live cpu], the snapshot being taken once the cpu goes on or stops being kept
+        entry = [RunResult(output + tuple(cpu.pop_output()), cpu.is_halted()), None, cpu]
+        self._put(key, entry)
+
+        self._live[id(entry)] = entry
+        if len(self._live) > self._max_live:
+            self._release(self._live.popitem(last=False)[1])
+
+        return entry
+
+    def _take_cpu(self, entry):
+        cpu = entry[2]
+        if cpu is None:
+            return self._cpu_class.from_snapshot(entry[1])
+
+        # Other runs can still resume from the entry
+        self._release(self._live.pop(id(entry)))
+
+        return cpu
+
+    @staticmethod
+    def _release(entry):
+        entry[1] = entry[2].snapshot()
+        entry[2] = None
+
+    def _get(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+
+        return entry
+
+    def _put(self, key, entry):
+        if key not in self._cache:
+            self._image_refs[key[0]][1] += 1
+
+        self._cache[key] = entry
+        if len(self._cache) > self._maxsize:
+            image_id = self._cache.popitem(last=False)[0][0]
+            refs = self._image_refs[image_id]
+            refs[1] -= 1
+            if refs[1] == 0:
+                del self._image_ids[refs[0]]
+                del self._image_refs[image_id]
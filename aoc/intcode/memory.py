@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+
+DEFAULT_PAGE_SIZE = 1024
+
+
+class PagedMemory:
+    """
+    Sparse memory made of fixed size pages, allocated on the first write into them.
+
+    Copies share their pages until one side writes into one, which then gets its own copy of that page.
+    """
+
+    def __init__(self, page_size=DEFAULT_PAGE_SIZE):
+        self._page_size = page_size
+        self._pages = {}
+        self._shared_pages = set()
+
+    @property
+    def page_size(self):
+        return self._page_size
+
+    @property
+    def nb_pages(self):
+        return len(self._pages)
+
+    def peek(self, addr):
+        page = self._pages.get(addr // self._page_size)
+        if page is None:
+            return 0
+
+        return page[addr % self._page_size]
+
+    def poke(self, addr, v):
+        page_no = addr // self._page_size
+
+        page = self._pages.get(page_no)
+        if page is None:
+            page = [0] * self._page_size
+            self._pages[page_no] = page
+        elif page_no in self._shared_pages:
+            page = list(page)
+            self._pages[page_no] = page
+            self._shared_pages.discard(page_no)
+
+        page[addr % self._page_size] = v
+
+    def pages(self):
+        """The allocated pages, as (page number, values) pairs."""
+        return self._pages.items()
+
+    def set_page(self, page_no, values):
+        self._pages[page_no] = list(values)
+        self._shared_pages.discard(page_no)
+
+    def copy(self):
+        other = type(self)(self._page_size)
+        other._pages = dict(self._pages)
+
+        self._shared_pages = set(self._pages)
+        other._shared_pages = set(self._pages)
+
+        return other
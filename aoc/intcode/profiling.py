@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+from collections import Counter
+
+from aoc.intcode.tracing import Tracer
+
+
+class Profiler(Tracer):
+    """
+    Count the instructions executed, per op, per op and modes combination, and per address.
+
+    Also keeps the highest address accessed, immediate parameters aside, and the instructions skipped by
+    fast-forwarded loops, per loop. Like any tracer, it has to be given to the cpu when it's created, so cpus that
+    aren't profiled run as fast as before.
+    """
+
+    def __init__(self):
+        self.ops = Counter()
+        self.modes = Counter()
+        self.addresses = Counter()
+        self.skipped = Counter()
+        self.high_water = -1
+
+        self._ops_at = {}
+
+    @property
+    def nb_instrs(self):
+        return sum(self.ops.values())
+
+    @property
+    def nb_skipped(self):
+        return sum(self.skipped.values())
+
+    def on_instr(self, cpu, ip, instr):
+        self.ops[instr.op] += 1
+        self.modes[instr.op, instr.modes] += 1
+        self.addresses[ip] += 1
+        self._ops_at[ip] = instr.op
+
+    def on_load(self, cpu, addr, mode, v):
+        if mode != 1:
+            self._access(cpu, addr, mode)
+
+    def on_store(self, cpu, addr, mode, v):
+        self._access(cpu, addr, mode)
+
+    def _access(self, cpu, addr, mode):
+        # Tracers get the parameter, relative ones are resolved here
+        if mode == 2:
+            addr += cpu._rel_offset
+
+        if addr > self.high_water:
+            self.high_water = addr
+
+    def on_skip(self, cpu, ip, nb_instrs):
+        self.skipped[ip] += nb_instrs
+
+    def report(self, file=None, top=20):
+        total = self.nb_instrs or 1
+
+        print(f"Instructions: {self.nb_instrs}", file=file)
+        print(f"Skipped instructions: {self.nb_skipped}", file=file)
+        print(f"Memory high-water: {self.high_water}", file=file)
+
+        print("\nOps:", file=file)
+        for op, n in self.ops.most_common(top):
+            print(f"  {op.name:<6} {n:>12} {n / total:>7.2%}", file=file)
+
+        print("\nModes:", file=file)
+        for (op, modes), n in self.modes.most_common(top):
+            modes = "".join(str(m) for m in modes)
+            print(f"  {op.name:<6} {modes:<4} {n:>12} {n / total:>7.2%}", file=file)
+
+        print("\nHot addresses:", file=file)
+        for ip, n in self.addresses.most_common(top):
+            print(f"  {ip:>6} {self._ops_at[ip].name:<6} {n:>12} {n / total:>7.2%}", file=file)
+
+        if self.skipped:
+            print("\nFast-forwarded loops:", file=file)
+            for ip, n in self.skipped.most_common(top):
+                print(f"  {ip:>6} {n:>12}", file=file)
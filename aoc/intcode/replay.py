@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+import bisect
+from collections import namedtuple
+
+from aoc.intcode.codec import read_int, read_ints, write_int, write_ints
+from aoc.intcode.cpu import IntCodeCPU, InterruptCode, Op, read_snapshot
+from aoc.intcode.tracing import Tracer
+
+DEFAULT_CHECKPOINT_INTERVAL = 100_000
+
+_MAGIC = b"ICTR\x03"
+
+_INPUT = b"I"
+_CHECKPOINT = b"C"
+_END = b"E"
+
+# Instructions executed and inputs read before the checkpoint, and the cpu state then
+Checkpoint = namedtuple("Checkpoint", "nb_instrs input_pos snapshot")
+
+
+class TraceRecorder(Tracer):
+    """
+    Record the input of a cpu, and checkpoints of its state every `checkpoint_interval` instructions, to `file`.
+
+    The first checkpoint is taken before the first instruction. Instructions are counted as in run(max_steps=...):
+    a READ waiting on input doesn't count until it actually reads.
+    """
+
+    def __init__(self, file, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self._file = file
+        self._interval = checkpoint_interval
+
+        self.nb_instrs = 0
+        self._nb_inputs = 0
+        self._last_checkpoint = None
+
+        file.write(_MAGIC)
+
+    def on_instr(self, cpu, ip, instr):
+        if self._last_checkpoint is None or self.nb_instrs - self._last_checkpoint >= self._interval:
+            self._checkpoint(cpu)
+
+        if instr.op != Op.READ:
+            self.nb_instrs += 1
+
+    def on_skip(self, cpu, ip, nb_instrs):
+        # Replayed by plain interpretation, that executes them
+        self.nb_instrs += nb_instrs
+
+    def on_input(self, cpu, v):
+        self.nb_instrs += 1
+        self._nb_inputs += 1
+
+        self._file.write(_INPUT)
+        write_int(self._file, v)
+
+    def close(self):
+        """Mark the end of the trace, with the number of instructions executed."""
+        self._file.write(_END)
+        write_int(self._file, self.nb_instrs)
+
+    def _checkpoint(self, cpu):
+        self._last_checkpoint = self.nb_instrs
+
+        f = self._file
+        f.write(_CHECKPOINT)
+        write_ints(f, [self.nb_instrs, self._nb_inputs])
+        cpu.save(f)
+
+
+class TraceReplayer:
+    """
+    Replay a trace written by a TraceRecorder, seeking to any instruction from the nearest checkpoint.
+
+    Seeking runs `cpu_class` with run(max_steps=...), so it must execute exactly that many instructions, as every
+    engine of ENGINES does.
+    """
+
+    def __init__(self, file, cpu_class=IntCodeCPU):
+        self._cpu_class = cpu_class
+
+        self.checkpoints = []
+        self.inputs = []
+        self.nb_instrs = None
+
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("Not an Intcode trace")
+
+        while True:
+            tag = file.read(1)
+            if not tag:
+                break
+
+            if tag == _INPUT:
+                self.inputs.append(read_int(file))
+            elif tag == _CHECKPOINT:
+                self.checkpoints.append(self._read_checkpoint(file))
+            elif tag == _END:
+                self.nb_instrs = read_int(file)
+            else:
+                raise ValueError(f"Invalid trace record: {tag!r}")
+
+        if not self.checkpoints:
+            raise ValueError("Empty trace")
+
+        self._offsets = [c.nb_instrs for c in self.checkpoints]
+
+    def seek(self, nb_instrs):
+        """Return a cpu in the state the recorded one was in after executing `nb_instrs` instructions."""
+        if self.nb_instrs is not None and nb_instrs > self.nb_instrs:
+            raise ValueError(f"The trace ends at instruction {self.nb_instrs}")
+
+        checkpoint = self.checkpoints[bisect.bisect_right(self._offsets, nb_instrs) - 1]
+
+        cpu = self._cpu_class.from_snapshot(checkpoint.snapshot)
+        cpu.send(*self.inputs[checkpoint.input_pos :])
+
+        if cpu.run(max_steps=nb_instrs - checkpoint.nb_instrs) == InterruptCode.WAITING_ON_INPUT:
+            raise ValueError(f"The trace ends before instruction {nb_instrs}")
+
+        # Output from before the seek point is of no use to the caller
+        cpu.pop_output()
+
+        return cpu
+
+    @staticmethod
+    def _read_checkpoint(f):
+        nb_instrs, input_pos = read_ints(f)
+
+        # Seeks replay the input from the trace, and drop the output
+        snapshot = read_snapshot(f)._replace(input=(), output=())
+
+        return Checkpoint(nb_instrs, input_pos, snapshot)
@@ -0,0 +1,143 @@
+#! /usr/bin/env python
+from collections import deque, namedtuple
+from time import perf_counter
+
+from aoc.intcode.cpu import InterruptCode
+
+SchedulerStats = namedtuple("SchedulerStats", "runs messages elapsed messages_per_second")
+
+
+class Topology:
+    """
+    Decide where the outputs of a cpu go.
+
+    route() yields (destination, values) pairs, destination being a cpu index, or None for values leaving the
+    network.
+    """
+
+    def route(self, src, values, nb_cpus):
+        raise NotImplementedError()
+
+
+class Chain(Topology):
+    def route(self, src, values, nb_cpus):
+        yield (src + 1 if src + 1 < nb_cpus else None), values
+
+
+class Ring(Topology):
+    def route(self, src, values, nb_cpus):
+        yield (src + 1) % nb_cpus, values
+
+
+class Mesh(Topology):
+    """Every output goes to all the other cpus."""
+
+    def route(self, src, values, nb_cpus):
+        for dst in range(nb_cpus):
+            if dst != src:
+                yield dst, values
+
+
+class Packets(Topology):
+    """
+    Outputs are frames of `frame_size` values, the first one being the address of the destination cpu.
+
+    Frames to unknown addresses leave the network, address included.
+    """
+
+    def __init__(self, frame_size=3):
+        self._frame_size = frame_size
+        self._partial = {}
+
+    def route(self, src, values, nb_cpus):
+        values = self._partial.pop(src, []) + values
+
+        end = len(values) - len(values) % self._frame_size
+        if end < len(values):
+            self._partial[src] = values[end:]
+
+        for i in range(0, end, self._frame_size):
+            dst = values[i]
+            if 0 <= dst < nb_cpus:
+                yield dst, values[i + 1 : i + self._frame_size]
+            else:
+                yield None, values[i : i + self._frame_size]
+
+
+class Scheduler:
+    """
+    Run a network of cpus cooperatively, routing their outputs according to `topology`.
+
+    Only cpus that have something to do get run: all of them at first, then the ones that got sent input.
+    Values that leave the network, or are sent to a halted cpu, are returned by pop_output().
+
+    With a `quantum`, each run is limited to that many instructions, so that a busy cpu doesn't keep the others
+    from running.
+    """
+
+    def __init__(self, cpus, topology, quantum=None):
+        self._cpus = list(cpus)
+        self._topology = topology
+        self._quantum = quantum
+
+        self._ready = deque(range(len(self._cpus)))
+        self._scheduled = set(self._ready)
+
+        self._output = []
+
+        self._runs = 0
+        self._messages = 0
+        self._elapsed = 0.0
+
+    @property
+    def stats(self):
+        elapsed = self._elapsed
+        return SchedulerStats(self._runs, self._messages, elapsed, self._messages / elapsed if elapsed else 0.0)
+
+    def send(self, dst, *values):
+        cpu = self._cpus[dst]
+        if cpu.is_halted():
+            self._output.extend(values)
+            return
+
+        cpu.send(*values)
+        self._schedule(dst)
+
+    def pop_output(self):
+        output = self._output
+        self._output = []
+        return output
+
+    def run(self):
+        """Run until every cpu is halted or waiting on input."""
+        t = perf_counter()
+
+        nb_cpus = len(self._cpus)
+        while self._ready:
+            src = self._ready.popleft()
+            self._scheduled.discard(src)
+
+            cpu = self._cpus[src]
+            interrupt = cpu.run(max_steps=self._quantum)
+            self._runs += 1
+
+            if interrupt in (InterruptCode.OUTPUT_READY, InterruptCode.BUDGET_EXHAUSTED):
+                self._schedule(src)
+
+            output = cpu.pop_output()
+            if not output:
+                continue
+
+            for dst, values in self._topology.route(src, output, nb_cpus):
+                self._messages += 1
+                if dst is None:
+                    self._output.extend(values)
+                else:
+                    self.send(dst, *values)
+
+        self._elapsed += perf_counter() - t
+
+    def _schedule(self, idx):
+        if idx not in self._scheduled:
+            self._scheduled.add(idx)
+            self._ready.append(idx)
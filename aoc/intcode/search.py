@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from aoc.intcode.image import parse_program
+from aoc.intcode.shared import ImageRegistry, SharedImage, attach
+
+DEFAULT_CHUNK_SIZE = 64
+
+# Program image of the worker processes, set once when they start
+_image = None
+
+
+def search(evaluate, program, space, key=None, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    """
+    Find the candidate of `space` for which `evaluate(image, candidate)` is the highest, using worker processes.
+
+    `evaluate` must be a module level function. It gets the program image, parsed and published to shared memory
+    once, that each worker attaches to when it starts. Results are compared through `key` if given, and reduced as
+    the chunks complete.
+
+    Returns the best (result, candidate) pair, or None if `space` is empty.
+    """
+    key = key or (lambda r: r)
+    max_workers = max_workers or os.cpu_count()
+    chunks = _chunks(space, chunk_size)
+
+    best = None
+    with ImageRegistry() as registry:
+        initargs = (_publish(registry, program),)
+
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=initargs) as executor:
+            # Keep a bounded number of chunks in flight so that large spaces aren't materialized at once
+            pending = {executor.submit(_evaluate_chunk, evaluate, c) for c in itertools.islice(chunks, 2 * max_workers)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    for result, candidate in future.result():
+                        if best is None or key(result) > key(best[0]):
+                            best = (result, candidate)
+
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.add(executor.submit(_evaluate_chunk, evaluate, chunk))
+
+    return best
+
+
+def _publish(registry, program):
+    image = parse_program(program)
+
+    try:
+        return registry.publish(image)
+    except (OverflowError, NotImplementedError):
+        # Sent to each worker instead
+        return image
+
+
+def _chunks(space, chunk_size):
+    it = iter(space)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def _init_worker(image):
+    global _image
+    _image = attach(image) if isinstance(image, SharedImage) else image
+
+
+def _evaluate_chunk(evaluate, chunk):
+    return [(evaluate(_image, candidate), candidate) for candidate in chunk]
@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+from array import array
+from collections import namedtuple
+
+from aoc.intcode.image import parse_program
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python 3.7, images are sent to the worker processes instead
+    shared_memory = None
+
+# Shared memory block holding a program image, and its number of values. Cheap to send to other processes.
+SharedImage = namedtuple("SharedImage", "name size")
+
+# Blocks attached by this process, keyed by name. They stay mapped until the process exits.
+_attached = {}
+
+
+class ImageRegistry:
+    """
+    Publish program images to shared memory, once each, for worker processes to attach to without copying them.
+
+    The blocks are unlinked when the registry is closed. Processes attached to them keep their mapping.
+    """
+
+    def __init__(self):
+        # image: (SharedImage, SharedMemory)
+        self._blocks = {}
+
+    def publish(self, program):
+        """
+        Return the SharedImage of `program`, publishing it if needed.
+
+        Raises OverflowError for programs with values that don't fit an int64, and NotImplementedError on python
+        versions without shared memory.
+        """
+        if shared_memory is None:
+            raise NotImplementedError("Shared memory requires python 3.8")
+
+        image = parse_program(program)
+
+        entry = self._blocks.get(image)
+        if entry is not None:
+            return entry[0]
+
+        values = array("q", image)
+        nb_bytes = len(values) * values.itemsize
+
+        block = shared_memory.SharedMemory(create=True, size=max(nb_bytes, 1))
+        block.buf[:nb_bytes] = values.tobytes()
+
+        ref = SharedImage(block.name, len(values))
+        self._blocks[image] = (ref, block)
+
+        return ref
+
+    def close(self):
+        for _, block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(ref):
+    """
+    Return the image of a SharedImage, as a read-only memoryview of its block.
+
+    Cpus run such images in place, and copy them on their first write.
+    """
+    block = _attached.get(ref.name)
+    if block is None:
+        block = shared_memory.SharedMemory(ref.name)
+        _attached[ref.name] = block
+
+    return block.buf[: ref.size * array("q").itemsize].cast("q").toreadonly()
@@ -0,0 +1,212 @@
+#! /usr/bin/env python
+import itertools
+
+from aoc.intcode.cpu import Op
+from aoc.intcode.image import parse_program
+
+# Instructions executed before giving up on a program
+MAX_STEPS = 10**6
+
+
+class SymbolicError(Exception):
+    """The program's control flow, or the value asked for, depends on the symbols."""
+
+
+class Poly:
+    """Polynomial with integer coefficients, as a dict mapping exponent tuples, one per symbol, to coefficients."""
+
+    def __init__(self, terms):
+        self.terms = {e: c for e, c in terms.items() if c}
+
+    @classmethod
+    def symbol(cls, idx, nb_symbols):
+        return cls({tuple(int(i == idx) for i in range(nb_symbols)): 1})
+
+    def __add__(self, o):
+        if o is UNKNOWN:
+            return UNKNOWN
+
+        terms = dict(self.terms)
+        for e, c in _terms(o, self._nb_symbols).items():
+            terms[e] = terms.get(e, 0) + c
+
+        return _simplify(Poly(terms))
+
+    __radd__ = __add__
+
+    def __mul__(self, o):
+        if o is UNKNOWN:
+            return UNKNOWN
+
+        terms = {}
+        for (e1, c1), (e2, c2) in itertools.product(self.terms.items(), _terms(o, self._nb_symbols).items()):
+            e = tuple(a + b for a, b in zip(e1, e2))
+            terms[e] = terms.get(e, 0) + c1 * c2
+
+        return _simplify(Poly(terms))
+
+    __rmul__ = __mul__
+
+    def __call__(self, *values):
+        total = 0
+        for e, c in self.terms.items():
+            for v, n in zip(values, e):
+                c *= v**n
+            total += c
+
+        return total
+
+    def degree(self, idx):
+        return max((e[idx] for e in self.terms), default=0)
+
+    @property
+    def _nb_symbols(self):
+        return len(next(iter(self.terms)))
+
+    def __repr__(self):
+        return f"Poly({self.terms})"
+
+
+class _Unknown:
+    """Value read from an address that depends on the symbols."""
+
+    def __add__(self, o):
+        return self
+
+    __radd__ = __mul__ = __rmul__ = __add__
+
+    def __repr__(self):
+        return "UNKNOWN"
+
+
+UNKNOWN = _Unknown()
+
+
+def _terms(v, nb_symbols):
+    if isinstance(v, Poly):
+        return v.terms
+
+    return {(0,) * nb_symbols: v}
+
+
+def _simplify(p):
+    # Polynomials left with a constant term only are plain ints again
+    if not p.terms:
+        return 0
+    if len(p.terms) == 1:
+        ((e, c),) = p.terms.items()
+        if not any(e):
+            return c
+
+    return p
+
+
+def run_symbolic(program, addrs, max_steps=MAX_STEPS):
+    """
+    Run a program with the values at `addrs` replaced by symbols, returning the memory once it halts.
+
+    Cells hold ints, Polys of the symbols, or UNKNOWN for values read through symbolic addresses. Raises
+    SymbolicError if an instruction, a jump or a store address depends on the symbols, or if the program reads
+    input.
+    """
+    mem = list(parse_program(program))
+    for i, addr in enumerate(addrs):
+        mem[addr] = Poly.symbol(i, len(addrs))
+
+    ip = 0
+    rel_offset = 0
+
+    def peek(addr):
+        if not isinstance(addr, int):
+            return UNKNOWN
+        return mem[addr] if 0 <= addr < len(mem) else 0
+
+    def address(n, mode):
+        param = peek(ip + n)
+        if mode == 0:
+            return param
+        if mode == 2:
+            return param + rel_offset
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    def ld(n, mode):
+        return peek(ip + n) if mode == 1 else peek(address(n, mode))
+
+    def st(n, mode, v):
+        addr = address(n, mode)
+        if not isinstance(addr, int):
+            raise SymbolicError(f"Store to a symbolic address at {ip}")
+        if addr >= len(mem):
+            mem.extend([0] * (addr + 1 - len(mem)))
+        mem[addr] = v
+
+    def concrete(v):
+        if not isinstance(v, int):
+            raise SymbolicError(f"Control flow depends on the symbols at {ip}")
+        return v
+
+    for _ in range(max_steps):
+        instr = concrete(peek(ip))
+        op = instr % 100
+        modes = [instr // 10 ** (n + 1) % 10 for n in range(1, 4)]
+
+        if op in (Op.ADD, Op.MUL):
+            v1, v2 = ld(1, modes[0]), ld(2, modes[1])
+            st(3, modes[2], v1 + v2 if op == Op.ADD else v1 * v2)
+            ip += 4
+        elif op in (Op.LT, Op.EQ):
+            v1, v2 = concrete(ld(1, modes[0])), concrete(ld(2, modes[1]))
+            st(3, modes[2], int(v1 < v2 if op == Op.LT else v1 == v2))
+            ip += 4
+        elif op in (Op.BNE, Op.BEQ):
+            v = concrete(ld(1, modes[0]))
+            ip = concrete(ld(2, modes[1])) if (v != 0) == (op == Op.BNE) else ip + 3
+        elif op == Op.REL:
+            rel_offset += concrete(ld(1, modes[0]))
+            ip += 2
+        elif op == Op.HALT:
+            return mem
+        elif op in (Op.READ, Op.WRITE):
+            raise SymbolicError(f"Unsupported I/O at {ip}")
+        else:
+            raise ValueError(f"Unsupported instr: {op}")
+
+    raise SymbolicError(f"Still running after {max_steps} instructions")
+
+
+def solve_for_output(program, addrs, expected, domain, out_addr=0):
+    """
+    Find values, from `domain`, to put at `addrs` for the program to leave `expected` at `out_addr`.
+
+    The value at `out_addr` is computed once as a polynomial of the inputs, then solved for the last input with
+    the other ones enumerated. Returns None if there is no solution, and raises SymbolicError if the program
+    can't be run symbolically.
+    """
+    p = run_symbolic(program, addrs)[out_addr]
+    if p is UNKNOWN:
+        raise SymbolicError(f"Value at {out_addr} depends on a symbolic address")
+
+    domain = list(domain)
+    if not isinstance(p, Poly):
+        return tuple(domain[0] for _ in addrs) if p == expected else None
+
+    last = len(addrs) - 1
+
+    for head in itertools.product(domain, repeat=last):
+        if p.degree(last) <= 1:
+            # p = a * x + b, with a and b evaluated from the other inputs
+            b = p(*head, 0)
+            a = p(*head, 1) - b
+            if a == 0:
+                candidates = domain[:1] if b == expected else []
+            elif (expected - b) % a == 0 and (expected - b) // a in domain:
+                candidates = [(expected - b) // a]
+            else:
+                candidates = []
+        else:
+            candidates = [x for x in domain if p(*head, x) == expected]
+
+        if candidates:
+            return head + (candidates[0],)
+
+    return None
@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+
+
+class Tracer:
+    """
+    Receives the events of an IntCodeCPU it's attached to.
+
+    A tracer is attached when the cpu is created. Cpus without one don't pay anything for tracing.
+    """
+
+    def on_instr(self, cpu, ip, instr):
+        pass
+
+    def on_load(self, cpu, addr, mode, v):
+        pass
+
+    def on_store(self, cpu, addr, mode, v):
+        pass
+
+    def on_input(self, cpu, v):
+        pass
+
+    def on_output(self, cpu, v):
+        pass
+
+    def on_skip(self, cpu, ip, nb_instrs):
+        """Called when the cpu skips `nb_instrs` instructions of the loop at `ip`, by computing their effect."""
+        pass
+
+
+class PrintTracer(Tracer):
+    """Print every event. Attached by default when DEBUG is set."""
+
+    def __init__(self, file=None):
+        self._file = file
+
+    def on_instr(self, cpu, ip, instr):
+        print(f"IP: {cpu!r} ip: {ip}, instr={instr.op.name}, mode={instr.modes}, {instr.params}", file=self._file)
+
+    def on_load(self, cpu, addr, mode, v):
+        print(f"LD: addr={addr}, mode={mode}, v={v}", file=self._file)
+
+    def on_store(self, cpu, addr, mode, v):
+        print(f"ST: addr={addr}, mode={mode}, v={v}", file=self._file)
+
+    def on_input(self, cpu, v):
+        print(f"IN: {v}", file=self._file)
+
+    def on_output(self, cpu, v):
+        print(f"OUT: {v}", file=self._file)
+
+    def on_skip(self, cpu, ip, nb_instrs):
+        print(f"SKIP: ip: {ip}, instrs={nb_instrs}", file=self._file)
@@ -1,6 +1,6 @@
-from unittest import TestCase, skip
+from unittest import TestCase
 
-from aoc.d02 import get_input_for_output, get_program_output
+from aoc.d02 import get_input_for_output, get_program_output, search_input_for_output, sweep_input_for_output
 
 
 class D02Test(TestCase):
@@ -9,7 +9,6 @@ class D02Test(TestCase):
 
         self.assertEqual(3500, get_program_output(program))
 
-    @skip("Test too slow")
     def test_get_input_for_output(self):
         program = (
             "1,0,0,3,1,1,2,3,1,3,4,3,1,5,0,3,2,10,1,19,1,5,19,23,1,23,5,27,2,27,10,31,1,5,31,"
@@ -23,3 +22,5 @@ class D02Test(TestCase):
         expected_output = 19690720
 
         self.assertEqual(2552, get_input_for_output(program, expected_output))
+        self.assertEqual(2552, sweep_input_for_output(program, expected_output))
+        self.assertEqual(2552, search_input_for_output(program, expected_output, chunk_size=500, max_workers=2))
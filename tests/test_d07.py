@@ -1,6 +1,12 @@
 from unittest import TestCase
 
-from aoc.d07 import get_thruster_output, get_thruster_output_with_feedback
+from aoc.d07 import (
+    get_max_thruster_output,
+    get_max_thruster_output_memoized,
+    get_thruster_output,
+    get_thruster_output_with_feedback,
+    search_max_thruster_output,
+)
 
 
 class D07Tests(TestCase):
@@ -38,3 +44,36 @@ class D07Tests(TestCase):
         for program, phase_settings, expected in test_inputs:
             with self.subTest(program=program, phase_settings=phase_settings):
                 self.assertEqual(expected, get_thruster_output_with_feedback(program, phase_settings))
+
+    def test_max_p1(self):
+        test_inputs = (
+            ("3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0", 43210),
+            ("3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0", 54321),
+        )
+
+        for program, expected in test_inputs:
+            with self.subTest(program=program):
+                self.assertEqual(expected, get_max_thruster_output(program, range(5)))
+
+    def test_max_p2(self):
+        program = "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5"
+
+        self.assertEqual(139629729, get_max_thruster_output(program, range(5, 10), feedback=True))
+
+    def test_search_max(self):
+        program = "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0"
+
+        self.assertEqual(43210, search_max_thruster_output(program, range(5), max_workers=2))
+
+        program = "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5"
+
+        self.assertEqual(139629729, search_max_thruster_output(program, range(5, 10), feedback=True, max_workers=2))
+
+    def test_max_memoized(self):
+        program = "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0"
+
+        self.assertEqual(43210, get_max_thruster_output_memoized(program, range(5)))
+
+        program = "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5"
+
+        self.assertEqual(139629729, get_max_thruster_output_memoized(program, range(5, 10), feedback=True))
@@ -1,6 +1,8 @@
+import io
+import pickle
 from unittest import TestCase
 
-from aoc.intcode import IntCodeCPU, InterruptCode
+from aoc.intcode import DecodedInstr, IntCodeCPU, InterruptCode, Op, Tracer
 
 
 class IntCodeCPUTest(TestCase):
@@ -44,6 +46,108 @@ class IntCodeCPUTest(TestCase):
 
         self.assertEqual(0, cpu._ip)
 
+    def test_send(self):
+        program = [3, 5, 4, 5, 99, 0]
+        cpu = IntCodeCPU(program)
+        cpu.send(42, 43)
+
+        self.assertIsNone(cpu.run())
+        self.assertEqual([42], cpu.pop_output())
+
+    def test_run_queues_input_after_sent_input(self):
+        program = [3, 9, 3, 10, 4, 9, 4, 10, 99, 0, 0]
+        cpu = IntCodeCPU(program)
+        cpu.send(1)
+        cpu.run((2,))
+
+        self.assertEqual([1, 2], cpu.pop_output())
+
+    def test_output_callback(self):
+        program = [104, 1, 104, 2, 99]
+        output = []
+        cpu = IntCodeCPU(program, output=output.append)
+        cpu.run()
+
+        self.assertEqual([1, 2], output)
+        self.assertEqual([], cpu.pop_output())
+
+    def test_output_limit(self):
+        program = [104, 1, 104, 2, 104, 3, 99]
+        cpu = IntCodeCPU(program, output_limit=2)
+
+        self.assertEqual(InterruptCode.OUTPUT_READY, cpu.run())
+        self.assertEqual([1, 2], cpu.pop_output())
+        self.assertEqual(4, cpu._ip)
+
+        self.assertIsNone(cpu.run())
+        self.assertEqual([3], cpu.pop_output())
+
+    def test_run_until_outputs(self):
+        program = [104, 1, 104, 2, 104, 3, 3, 0, 99]
+        cpu = IntCodeCPU(program)
+
+        self.assertEqual(InterruptCode.OUTPUT_READY, cpu.run_until_outputs(2))
+        self.assertEqual([1, 2], cpu.pop_output())
+
+        self.assertEqual(InterruptCode.WAITING_ON_INPUT, cpu.run_until_outputs(2))
+        self.assertEqual([3], cpu.pop_output())
+
+        self.assertIsNone(cpu.run_until_outputs(2, [0]))
+        self.assertEqual(float("inf"), cpu._output_limit)
+
+    def test_frames(self):
+        # Output the input, and twice the input, until it is 0
+        program = [3, 14, 4, 14, 102, 2, 14, 14, 4, 14, 1005, 14, 0, 99, 0]
+        cpu = IntCodeCPU(program)
+
+        self.assertEqual([(1, 2), (3, 6)], list(cpu.frames(2, [1, 3])))
+        self.assertFalse(cpu.is_halted())
+
+        # Incomplete frames stay buffered
+        self.assertEqual([], list(cpu.frames(3, [5])))
+        self.assertEqual([(5, 10, 0)], list(cpu.frames(3, [0])))
+        self.assertTrue(cpu.is_halted())
+        self.assertEqual([0], cpu.pop_output())
+
+    def test_frames_with_output_sink(self):
+        output = []
+        cpu = IntCodeCPU([104, 1, 104, 2, 99], output=output.append)
+
+        with self.assertRaises(ValueError):
+            cpu.run_until_outputs(1)
+        with self.assertRaises(ValueError):
+            list(cpu.frames(2))
+
+        self.assertEqual([], output)
+
+    def test_max_steps(self):
+        # Infinite loop incrementing a counter
+        program = [1001, 7, 1, 7, 1105, 1, 0, 0]
+        cpu = IntCodeCPU(program)
+
+        self.assertEqual(InterruptCode.BUDGET_EXHAUSTED, cpu.run(max_steps=10))
+        self.assertEqual(5, cpu.peek(7))
+        self.assertEqual(0, cpu._ip)
+
+        self.assertEqual(InterruptCode.BUDGET_EXHAUSTED, cpu.run(max_steps=3))
+        self.assertEqual(7, cpu.peek(7))
+        self.assertEqual(4, cpu._ip)
+
+    def test_max_steps_halt(self):
+        program = [1101, 1, 2, 5, 99, 0]
+        cpu = IntCodeCPU(program)
+
+        self.assertIsNone(cpu.run(max_steps=2))
+        self.assertIsNone(cpu.run(max_steps=0))
+
+    def test_run_after_halt(self):
+        program = [104, 1, 99]
+        cpu = IntCodeCPU(program)
+
+        self.assertIsNone(cpu.run())
+        self.assertIsNone(cpu.run())
+        self.assertEqual([1], cpu.pop_output())
+
     def test_write(self):
         program = [4, 3, 99, 42]
         cpu = IntCodeCPU(program)
@@ -101,6 +205,68 @@ class IntCodeCPUTest(TestCase):
         cpu.run()
         self.assertEqual(0, cpu.peek(7))
 
+    def test_decode_is_cached(self):
+        program = [1101, 1, 2, 5, 99, 0]
+        cpu = IntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual(DecodedInstr(Op.ADD, cpu.add, (1, 1, 0), (1, 2, 5), 4), cpu._decoded[0])
+        self.assertEqual(3, cpu.peek(5))
+
+    def test_self_modifying_code_invalidates_decode(self):
+        # Loop twice over a WRITE whose operand gets overwritten by the ADD following it
+        program = [104, 1, 1101, 0, 7, 1, 1001, 19, 1, 19, 1008, 19, 2, 18, 1006, 18, 0, 99, 0, 0]
+        cpu = IntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual([1, 7], cpu.pop_output())
+
+    def test_compare_and_branch_are_fused(self):
+        # Count to 5, looping with a LT followed by a BNE on the cell it stored to
+        program = [1001, 20, 1, 20, 1007, 20, 5, 21, 1005, 21, 0, 4, 20, 99, 0, 0, 0, 0, 0, 0, 0, 0]
+        cpu = IntCodeCPU(program[:])
+        cpu.run()
+
+        self.assertEqual([5], cpu.pop_output())
+        self.assertEqual((Op.LT, Op.BNE), tuple(i.op for i in cpu._decoded[4].parts))
+
+        # Traced cpus run the instructions one by one, with the same result
+        cpu = IntCodeCPU(program[:], tracer=Tracer())
+        cpu.run()
+
+        self.assertEqual([5], cpu.pop_output())
+        self.assertIsNone(cpu._decoded[4].parts)
+
+    def test_add_and_rel_are_fused(self):
+        program = [109, 20, 21101, 3, 4, 0, 109, 1, 204, -1, 99] + [0] * 10
+        cpu = IntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual([7], cpu.pop_output())
+        self.assertEqual(21, cpu._rel_offset)
+        self.assertEqual((Op.ADD, Op.REL), tuple(i.op for i in cpu._decoded[2].parts))
+
+    def test_self_modifying_code_invalidates_fused_instr(self):
+        # The first pass through the fused LT and BNE jumps to 12, which retargets the BNE to 21 and loops back
+        program = [1007, 30, 1, 31, 1005, 31, 12, 104, 99, 99, 0, 0, 104, 1, 1101, 0, 21, 6, 1105, 1, 0, 104, 42, 99]
+        cpu = IntCodeCPU(program + [0] * 8, output_limit=3)
+        cpu.run()
+
+        self.assertEqual([1, 42], cpu.pop_output())
+        self.assertTrue(cpu.is_halted())
+
+    def test_max_steps_counts_fused_instrs(self):
+        program = [1001, 20, 1, 20, 1007, 20, 5, 21, 1005, 21, 0, 4, 20, 99, 0, 0, 0, 0, 0, 0, 0, 0]
+        cpu = IntCodeCPU(program)
+        cpu.run(max_steps=2)
+
+        self.assertEqual(8, cpu._ip)
+        self.assertEqual(1, cpu.peek(21))
+
+        cpu.run(max_steps=1)
+
+        self.assertEqual(0, cpu._ip)
+
     def test_unsupported_intcode(self):
         program = [42]
         cpu = IntCodeCPU(program)
@@ -112,25 +278,186 @@ class IntCodeCPUTest(TestCase):
     def test_ld_mode_0(self):
         program = [0, 99]
         cpu = IntCodeCPU(program)
-        cpu._modes = [0]
-        self.assertEqual(99, cpu._ld(1))
+        self.assertEqual(99, cpu._ld(1, 0))
 
     def test_ld_mode_1(self):
         program = []
         cpu = IntCodeCPU(program)
-        cpu._modes = [1]
-        self.assertEqual(99, cpu._ld(99))
+        self.assertEqual(99, cpu._ld(99, 1))
 
     def test_ld_invalid_mode(self):
         program = []
         cpu = IntCodeCPU(program)
-        cpu._modes = [42]
         with self.assertRaises(ValueError) as exc_ctx:
-            cpu._ld(0)
+            cpu._ld(0, 42)
 
         self.assertEqual("Unsupported mode: 42", str(exc_ctx.exception))
 
 
+class SnapshotTest(TestCase):
+    # Add each input to a running total and output it
+    program = [3, 11, 1, 11, 12, 12, 4, 12, 1105, 1, 0, 0, 0]
+
+    def test_fork(self):
+        cpu = IntCodeCPU(self.program[:])
+        cpu.run((5,))
+
+        child = cpu.fork()
+        self.assertIs(cpu._intcodes, child._intcodes)
+
+        cpu.run((1,))
+        child.run((10,))
+
+        self.assertEqual([5, 6], cpu.pop_output())
+        self.assertEqual([5, 15], child.pop_output())
+        self.assertIsNot(cpu._intcodes, child._intcodes)
+
+    def test_snapshot_is_not_modified(self):
+        cpu = IntCodeCPU(self.program[:])
+        snapshot = cpu.snapshot()
+
+        cpu.run((5,))
+        cpu.poke(12, 100)
+
+        self.assertEqual(self.program, snapshot.memory)
+        self.assertEqual(0, snapshot.ip)
+
+    def test_from_snapshot(self):
+        cpu = IntCodeCPU(self.program[:])
+        cpu.run((5,))
+        snapshot = cpu.snapshot()
+
+        for i in range(3):
+            restored = IntCodeCPU.from_snapshot(snapshot)
+            restored.run((i,))
+            self.assertEqual([5, 5 + i], restored.pop_output())
+
+
+class CheckpointTest(TestCase):
+    # Add each input to a running total and output it
+    program = [3, 11, 1, 11, 12, 12, 4, 12, 1105, 1, 0, 0, 0]
+
+    def test_save_load(self):
+        cpu = IntCodeCPU(self.program[:])
+        cpu.run((5,))
+        cpu.send(2, 3)
+
+        f = io.BytesIO()
+        cpu.save(f)
+        f.seek(0)
+        restored = IntCodeCPU.load(f)
+
+        self.assertEqual(cpu._intcodes, restored._intcodes)
+        self.assertEqual(cpu._ip, restored._ip)
+        self.assertEqual([5], restored.pop_output())
+
+        restored.run()
+        self.assertEqual([7, 10], restored.pop_output())
+
+    def test_stream(self):
+        cpu = IntCodeCPU(self.program[:])
+
+        f = io.BytesIO()
+        for i in range(3):
+            cpu.run((i,))
+            cpu.save(f)
+
+        f.seek(0)
+        self.assertEqual([[0], [0, 1], [0, 1, 3]], [IntCodeCPU.load(f).pop_output() for _ in range(3)])
+
+        with self.assertRaises(EOFError):
+            IntCodeCPU.load(f)
+
+    def test_big_numbers_and_far_memory(self):
+        # Store a big number far away, output it and halt
+        program = [1101, 2 ** 40, 2 ** 40, 10 ** 9, 4, 10 ** 9, 99]
+        cpu = IntCodeCPU(program)
+        cpu.run()
+
+        f = io.BytesIO()
+        cpu.save(f)
+        f.seek(0)
+        restored = IntCodeCPU.load(f, typed_memory=True)
+
+        self.assertTrue(restored.is_halted())
+        self.assertEqual(2 ** 41, restored._peek(10 ** 9))
+        self.assertEqual([2 ** 41], restored.pop_output())
+
+    def test_dense_limit(self):
+        # Store 7 to a far cell, then grow the dense memory
+        cpu = IntCodeCPU([1101, 7, 0, 65646, 1101, 1, 0, 1000, 99, 0])
+        cpu.run()
+
+        f = io.BytesIO()
+        cpu.save(f)
+        f.seek(0)
+        restored = IntCodeCPU.load(f)
+        restored._poke(65700, 5)
+
+        self.assertEqual(7, restored._peek(65646))
+
+    def test_smaller_than_pickle(self):
+        cpu = IntCodeCPU(self.program + list(range(1000)))
+        cpu.run((5,))
+
+        f = io.BytesIO()
+        cpu.save(f)
+
+        self.assertLess(len(f.getvalue()), len(pickle.dumps(cpu)))
+
+    def test_invalid_checkpoint(self):
+        with self.assertRaises(ValueError):
+            IntCodeCPU.load(io.BytesIO(b"nope"))
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def on_instr(self, cpu, ip, instr):
+        self.events.append(("instr", ip, instr.op))
+
+    def on_load(self, cpu, addr, mode, v):
+        self.events.append(("ld", addr, mode, v))
+
+    def on_store(self, cpu, addr, mode, v):
+        self.events.append(("st", addr, mode, v))
+
+    def on_input(self, cpu, v):
+        self.events.append(("in", v))
+
+    def on_output(self, cpu, v):
+        self.events.append(("out", v))
+
+
+class TracerTest(TestCase):
+    def test_events(self):
+        program = [3, 9, 1001, 9, 2, 9, 4, 9, 99, 0]
+        tracer = RecordingTracer()
+        cpu = IntCodeCPU(program, tracer=tracer)
+        cpu.run((40,))
+
+        expected = [
+            ("instr", 0, Op.READ),
+            ("st", 9, 0, 40),
+            ("in", 40),
+            ("instr", 2, Op.ADD),
+            ("ld", 9, 0, 40),
+            ("ld", 2, 1, 2),
+            ("st", 9, 0, 42),
+            ("instr", 6, Op.WRITE),
+            ("ld", 9, 0, 42),
+            ("out", 42),
+            ("instr", 8, Op.HALT),
+        ]
+        self.assertEqual(expected, tracer.events)
+
+    def test_no_tracer(self):
+        cpu = IntCodeCPU([99])
+
+        self.assertEqual(cpu.halt, cpu._instr_map[Op.HALT][0])
+
+
 class IntCodeProgramsTest(TestCase):
     def test_relative_mode_addressing(self):
         program = [int(i) for i in "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99".split(",")]
@@ -146,6 +473,31 @@ class IntCodeProgramsTest(TestCase):
 
         self.assertEqual([1219070632396864], cpu.pop_output())
 
+    def test_far_memory(self):
+        program = "1101,1,2,1000000000,1001,1000000000,5,1000000001,4,1000000001,99"
+        cpu = IntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual([8], cpu.pop_output())
+        self.assertEqual(11, cpu._ram_size)
+        self.assertEqual(1, cpu._far.nb_pages)
+
+    def test_typed_memory(self):
+        program = "1101,1,2,7,4,7,99,0"
+        cpu = IntCodeCPU(program, typed_memory=True)
+        cpu.run()
+
+        self.assertEqual([3], cpu.pop_output())
+        self.assertEqual("q", cpu._intcodes.typecode)
+
+    def test_typed_memory_big_numbers(self):
+        program = "1102,34915192,34915192,11,1002,11,34915192,11,4,11,99,0"
+        cpu = IntCodeCPU(program, typed_memory=True)
+        cpu.run()
+
+        self.assertEqual([34915192**3], cpu.pop_output())
+        self.assertIsInstance(cpu._intcodes, list)
+
     def test_output_middle_number(self):
         program = "104,1125899906842624,99"
         cpu = IntCodeCPU(program[:])
@@ -0,0 +1,40 @@
+import asyncio
+from unittest import TestCase
+
+from aoc.intcode import AsyncIntCodeCPU
+
+# Read a value and output it incremented by one
+INCREMENT = "3,9,1001,9,1,9,4,9,99,0"
+
+# Output the program id 10 times, from the first input
+REPEAT = "3,16,4,16,1001,17,1,17,1008,17,10,18,1006,18,2,99,0,0,0"
+
+
+class AsyncIntCodeCPUTest(TestCase):
+    def test_chain(self):
+        async def run_chain(n):
+            queues = [asyncio.Queue() for _ in range(n + 1)]
+            cpus = [AsyncIntCodeCPU(INCREMENT, i, queues[i], queues[i + 1]) for i in range(n)]
+
+            await queues[0].put(0)
+            await asyncio.gather(*(cpu.run_async() for cpu in cpus))
+
+            return queues[-1].get_nowait()
+
+        self.assertEqual(200, asyncio.run(run_chain(200)))
+
+    def test_quantum(self):
+        async def run_pair():
+            output = asyncio.Queue()
+            cpus = [AsyncIntCodeCPU(REPEAT, i, output_queue=output, quantum=4) for i in range(2)]
+            for i, cpu in enumerate(cpus):
+                cpu.input_queue.put_nowait(i)
+
+            await asyncio.gather(*(cpu.run_async() for cpu in cpus))
+
+            return [output.get_nowait() for _ in range(output.qsize())]
+
+        outputs = asyncio.run(run_pair())
+
+        self.assertEqual([0] * 10 + [1] * 10, sorted(outputs))
+        self.assertNotEqual(sorted(outputs), outputs)
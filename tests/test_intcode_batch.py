@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+import numpy as np
+
+from aoc.intcode import BatchIntCodeCPU, IntCodeCPU, LaneState, run_batch
+
+
+class BatchIntCodeCPUTest(TestCase):
+    def test_matches_scalar_cpu(self):
+        # Outputs 999, 1000 or 1001 depending on the input being below, equal or above 8
+        program = (
+            "3,21,1008,21,8,20,1005,20,22,107,8,21,20,1006,20,31,1106,0,36,98,0,0,1002,21,125,20,4,20,1105,1,46,104,"
+            "999,1105,1,46,1101,1000,1,20,4,20,1105,1,46,98,99"
+        )
+        inputs = list(range(4, 13))
+
+        cpu = BatchIntCodeCPU(program, len(inputs))
+        state = cpu.run(np.array(inputs)[:, np.newaxis])
+
+        expected = []
+        for i in inputs:
+            scalar = IntCodeCPU(program)
+            scalar.run((i,))
+            expected.append(scalar.pop_output())
+
+        self.assertEqual([LaneState.HALTED] * len(inputs), state.tolist())
+        self.assertEqual(expected, cpu.pop_output())
+
+    def test_run_batch_pokes(self):
+        program = "1,0,0,0,99"
+        cpu = run_batch(program, (1, 2), [(0, 0), (4, 4), (0, 4)])
+
+        self.assertEqual([2, 198, 100], cpu.peek(0).tolist())
+
+    def test_waiting_on_input(self):
+        program = "3,11,3,12,2,11,12,13,4,13,99,0,0,0"
+        cpu = BatchIntCodeCPU(program, 2)
+
+        state = cpu.run([[2], [3]])
+        self.assertEqual([LaneState.WAITING_ON_INPUT] * 2, state.tolist())
+
+        state = cpu.run([[5], [7]])
+        self.assertEqual([LaneState.HALTED] * 2, state.tolist())
+        self.assertEqual([[10], [21]], cpu.pop_output())
+
+    def test_faulted_lane(self):
+        # The second lane jumps to an invalid instruction, the first one halts
+        program = "1105,1,4,0,99,42"
+        cpu = run_batch(program, (2,), [(4,), (5,)])
+
+        self.assertEqual([LaneState.HALTED, LaneState.FAULTED], cpu.state.tolist())
+
+    def test_big_numbers(self):
+        cpu = BatchIntCodeCPU("1102,34915192,34915192,7,4,7,99,0", 1, dtype=object)
+        cpu.run()
+
+        self.assertEqual([[1219070632396864]], cpu.pop_output())
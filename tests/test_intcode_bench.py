@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from aoc.intcode import CompiledIntCodeCPU, FastForwardIntCodeCPU, IntCodeCPU
+from aoc.intcode.bench import BENCHMARKS, BenchResult, compare, run_benchmark
+
+
+class BenchTest(TestCase):
+    def test_workloads(self):
+        expected = {
+            "arith": sum(range(100)),
+            "recursion": sum(range(101)),
+            "ping_pong": 99,
+            "counted_loop": 300,
+            "self_modifying": 99,
+        }
+
+        for name, (workload, _) in BENCHMARKS.items():
+            for cpu_class in (IntCodeCPU, CompiledIntCodeCPU, FastForwardIntCodeCPU):
+                with self.subTest(name=name, cpu_class=cpu_class):
+                    self.assertEqual(expected[name], workload(100, cpu_class))
+
+    def test_run_benchmark(self):
+        result = run_benchmark("arith", 10, repeat=1)
+
+        self.assertEqual("arith", result.name)
+        self.assertEqual(52, result.nb_instrs)
+        self.assertGreater(result.elapsed, 0)
+        self.assertGreater(result.peak_memory, 0)
+
+    def test_skipped_instrs_count(self):
+        result = run_benchmark("counted_loop", 100, FastForwardIntCodeCPU, repeat=1)
+
+        self.assertEqual(402, result.nb_instrs)
+
+    def test_compare(self):
+        result = BenchResult("arith", 10, 100, 2e-6, 0)
+
+        self.assertAlmostEqual(0.25, compare(result, {"arith": {"size": 10, "ns_per_instr": 16}}))
+        self.assertIsNone(compare(result, {"arith": {"size": 20, "ns_per_instr": 16}}))
+        self.assertIsNone(compare(result, {}))
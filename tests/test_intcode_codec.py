@@ -0,0 +1,34 @@
+from io import BytesIO
+from unittest import TestCase
+
+from aoc.intcode.codec import read_int, read_ints, write_int, write_ints
+
+
+class CodecTest(TestCase):
+    def test_ints(self):
+        for values in ([], [1, -2, 3], [1, 2**70, -(2**64)]):
+            with self.subTest(values=values):
+                f = BytesIO()
+                write_ints(f, values)
+                write_int(f, values[-1] if values else 0)
+                f.seek(0)
+
+                self.assertEqual(values, read_ints(f))
+                self.assertEqual(values[-1] if values else 0, read_int(f))
+
+    def test_compact(self):
+        for values, itemsize in ((range(100), 1), (range(-1000, 0), 2), ([2**40], 8)):
+            with self.subTest(values=values):
+                f = BytesIO()
+                write_ints(f, values)
+                f.seek(0)
+
+                self.assertEqual(1 + 8 + len(values) * itemsize, len(f.getvalue()))
+                self.assertEqual(list(values), read_ints(f))
+
+    def test_truncated(self):
+        f = BytesIO()
+        write_ints(f, range(100))
+
+        with self.assertRaises(EOFError):
+            read_ints(BytesIO(f.getvalue()[:-1]))
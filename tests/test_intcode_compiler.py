@@ -0,0 +1,127 @@
+from unittest import TestCase
+
+from aoc.intcode import CompiledIntCodeCPU, IntCodeCPU, InterruptCode, create_cpu
+from aoc.intcode.bench import arith_program, self_modifying_program
+
+
+class CompiledIntCodeCPUTest(TestCase):
+    def test_loop(self):
+        # Sum 1..100, then output it
+        program = [1, 21, 20, 21, 1001, 20, 1, 20, 1007, 20, 101, 22, 1005, 22, 0, 4, 21, 99, 0, 0, 1, 0, 0]
+        cpu = CompiledIntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual([5050], cpu.pop_output())
+        self.assertTrue(cpu._blocks)
+
+    def test_max_steps(self):
+        program = [1001, 7, 1, 7, 1105, 1, 0, 0]
+        cpu = CompiledIntCodeCPU(program)
+
+        for _ in range(10):
+            self.assertEqual(InterruptCode.BUDGET_EXHAUSTED, cpu.run(max_steps=10))
+
+        self.assertEqual(50, cpu.peek(7))
+        self.assertTrue(cpu._blocks)
+
+    def test_max_steps_is_exact(self):
+        # Blocks of the self-modifying program exit early after writing to themselves
+        for program in (arith_program(50), self_modifying_program(50)):
+            with self.subTest(program=program):
+                expected = IntCodeCPU(program[:])
+                cpu = CompiledIntCodeCPU(program[:])
+
+                while not expected.is_halted():
+                    self.assertEqual(expected.run(max_steps=7), cpu.run(max_steps=7))
+                    self.assertEqual(expected._ip, cpu._ip)
+                    self.assertEqual(expected._intcodes, cpu._intcodes)
+
+                self.assertTrue(cpu._blocks)
+
+    def test_far_memory(self):
+        # Count to 10 in a far cell, then output it
+        program = [1001, 10**9, 1, 10**9, 1008, 10**9, 10, 14, 1006, 14, 0, 4, 10**9, 99, 0]
+        cpu = CompiledIntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual([10], cpu.pop_output())
+        self.assertEqual(len(program), cpu._ram_size)
+
+    def test_relative_mode_addressing(self):
+        program = [int(i) for i in "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99".split(",")]
+        cpu = CompiledIntCodeCPU(program[:])
+        cpu.run()
+
+        self.assertEqual(program, cpu.pop_output())
+
+    def test_read_interrupt(self):
+        # Echo inputs until a 0 is read
+        program = [3, 9, 4, 9, 1005, 9, 0, 99, 0, 0]
+        cpu = CompiledIntCodeCPU(program)
+
+        for i in range(1, 10):
+            self.assertEqual(InterruptCode.WAITING_ON_INPUT, cpu.run((i,)))
+
+        self.assertIsNone(cpu.run((0,)))
+        self.assertEqual(list(range(1, 10)) + [0], cpu.pop_output())
+
+    def test_output_limit(self):
+        # Output 0 to 9
+        program = [4, 14, 1001, 14, 1, 14, 1007, 14, 10, 15, 1005, 15, 0, 99, 0, 0]
+        cpu = CompiledIntCodeCPU(program, output_limit=3)
+
+        outputs = []
+        while cpu.run() == InterruptCode.OUTPUT_READY:
+            outputs.append(cpu.pop_output())
+
+        self.assertEqual([[0, 1, 2], [3, 4, 5], [6, 7, 8]], outputs)
+        self.assertEqual([9], cpu.pop_output())
+
+    def test_self_modifying_code_invalidates_block(self):
+        # The ADD rewrites the operand of the WRITE at the start of the same block on each pass
+        program = [104, 1, 1001, 1, 1, 1, 1001, 19, 1, 19, 1008, 19, 10, 18, 1006, 18, 0, 99, 0, 0]
+        cpu = CompiledIntCodeCPU(program)
+        cpu.run()
+
+        self.assertEqual(list(range(1, 11)), cpu.pop_output())
+
+    def test_snapshot_from_output_sink(self):
+        # Output 1 to 50
+        program = [1001, 14, 1, 14, 4, 14, 1007, 14, 50, 15, 1005, 15, 0, 99, 0, 0]
+        snapshots = []
+
+        def sink(v):
+            if v == 20:
+                snapshots.append(cpu.snapshot())
+
+        cpu = CompiledIntCodeCPU(program, output=sink)
+        cpu.run()
+
+        self.assertEqual(50, cpu.peek(14))
+        self.assertEqual(20, snapshots[0].memory[14])
+
+    def test_unsupported_mode_left_to_interpreter(self):
+        # Cell 4 holds an ADD with mode 3 only between iterations, the first instruction of the loop fixing it
+        program = [1101, 1, 0, 4, 30001, 20, 20, 20, 1101, 30001, 0, 4, 1001, 21, -1, 21, 1005, 21, 0, 99, 0, 10]
+        cpu = CompiledIntCodeCPU(program)
+        cpu.run()
+
+        self.assertTrue(cpu.is_halted())
+        self.assertEqual(0, cpu.peek(21))
+        self.assertTrue(cpu._blocks)
+
+        with self.assertRaises(ValueError) as exc_ctx:
+            CompiledIntCodeCPU([30001, 0, 0, 0, 99]).run()
+
+        self.assertEqual("Unsupported mode: 3", str(exc_ctx.exception))
+
+
+class CreateCPUTest(TestCase):
+    def test_engines(self):
+        self.assertIsInstance(create_cpu("99", engine="compiler"), CompiledIntCodeCPU)
+
+    def test_unsupported_engine(self):
+        with self.assertRaises(ValueError) as exc_ctx:
+            create_cpu("99", engine="gpu")
+
+        self.assertEqual("Unsupported engine: gpu", str(exc_ctx.exception))
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from aoc.intcode import CompiledIntCodeCPU, Controller, IntCodeCPU, InterruptCode
+
+# Output the input, and twice the input, until it is 0
+DOUBLE = [3, 14, 4, 14, 102, 2, 14, 14, 4, 14, 1005, 14, 0, 99, 0]
+
+
+class ScriptedController(Controller):
+    def __init__(self, inputs):
+        self.inputs = list(inputs)
+        self.outputs = []
+        self.halt_output = None
+
+    def next_input(self, cpu, output):
+        self.outputs.append(output)
+        return self.inputs.pop(0) if self.inputs else None
+
+    def on_halt(self, cpu, output):
+        self.halt_output = output
+
+
+class DriveTest(TestCase):
+    def test_drive(self):
+        for cls in (IntCodeCPU, CompiledIntCodeCPU):
+            controller = ScriptedController([1, 3, 0])
+            cpu = cls(DOUBLE[:])
+
+            self.assertIsNone(cpu.drive(controller))
+            self.assertEqual([[], [1, 2], [3, 6]], controller.outputs)
+            self.assertEqual([0, 0], controller.halt_output)
+            self.assertEqual(3, cpu.drive_stats.steps)
+
+    def test_pause(self):
+        controller = ScriptedController([1])
+        cpu = IntCodeCPU(DOUBLE[:])
+
+        self.assertEqual(InterruptCode.WAITING_ON_INPUT, cpu.drive(controller))
+        self.assertEqual([[], [1, 2]], controller.outputs)
+        self.assertIsNone(controller.halt_output)
+
+        # The cpu can be run as usual afterwards
+        self.assertIsNone(cpu.run([0]))
+        self.assertEqual([0, 0], cpu.pop_output())
+        self.assertEqual(1, cpu.drive_stats.steps)
+
+    def test_queued_input_is_read_first(self):
+        controller = ScriptedController([0])
+        cpu = IntCodeCPU(DOUBLE[:])
+        cpu.send(5)
+
+        self.assertIsNone(cpu.drive(controller))
+        self.assertEqual([[5, 10]], controller.outputs)
+
+    def test_stats(self):
+        cpu = IntCodeCPU(DOUBLE[:])
+
+        self.assertEqual((0, 0.0, 0.0), cpu.drive_stats)
+
+        cpu.drive(ScriptedController([1, 0]))
+        stats = cpu.drive_stats
+
+        self.assertEqual(2, stats.steps)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertAlmostEqual(stats.steps / stats.elapsed, stats.steps_per_second)
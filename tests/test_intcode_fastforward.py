@@ -0,0 +1,97 @@
+from io import StringIO
+from unittest import TestCase
+
+from aoc.intcode import FastForwardIntCodeCPU, IntCodeCPU, LoopSummary, Profiler, summarize_loop
+from aoc.intcode.bench import arith_program, counted_loop_program, self_modifying_program
+
+# Count down from 100 with a BNE on the counter itself, adding 2 to a second counter, then output it
+COUNTDOWN = [1001, 14, -1, 14, 1001, 15, 2, 15, 1005, 14, 0, 4, 15, 99, 100, 0]
+
+# Count up until the counter equals 50, with an EQ and a BEQ, then output it
+COUNT_TO_EQUAL = [1001, 14, 1, 14, 8, 14, 15, 16, 1006, 16, 0, 4, 14, 99, 0, 50, 0]
+
+# Count down from 1000 while the counter isn't lower than 10, with a LT and a BEQ, then output it
+COUNT_DOWN_TO = [1001, 14, -1, 14, 7, 14, 15, 16, 1006, 16, 0, 4, 14, 99, 1000, 10, 0]
+
+# Count to 60 in cells relative to the base
+RELATIVE = [109, 100, 21201, 0, 1, 0, 21207, 0, 60, 1, 1205, 1, 2, 204, 0, 99]
+
+# Increment the same cell twice per iteration, once through the relative base, until it reaches 100
+ALIASED = [1001, 20, 1, 20, 21001, 20, 1, 20, 1007, 20, 100, 21, 1005, 21, 0, 4, 20, 99, 0, 0, 0, 0]
+
+
+class FastForwardIntCodeCPUTest(TestCase):
+    def assert_same_as_interpreter(self, program):
+        expected = IntCodeCPU(program[:])
+        expected.run()
+
+        cpu = FastForwardIntCodeCPU(program[:])
+        cpu.run()
+
+        self.assertEqual(expected.pop_output(), cpu.pop_output())
+        self.assertEqual(expected._intcodes, cpu._intcodes)
+        self.assertEqual(expected._ip, cpu._ip)
+
+        return cpu
+
+    def test_counted_loops(self):
+        for program in (counted_loop_program(1000), COUNTDOWN, COUNT_TO_EQUAL, COUNT_DOWN_TO, RELATIVE):
+            with self.subTest(program=program):
+                cpu = self.assert_same_as_interpreter(program)
+                self.assertTrue(any(cpu._loops.values()))
+
+    def test_fallback(self):
+        # sum += i isn't affine, the loop is interpreted
+        cpu = self.assert_same_as_interpreter(arith_program(100))
+        self.assertFalse(any(cpu._loops.values()))
+
+        self.assert_same_as_interpreter(self_modifying_program(100))
+
+    def test_aliased_cells(self):
+        cpu = self.assert_same_as_interpreter(ALIASED)
+        self.assertEqual(100, cpu.peek(20))
+
+    def test_max_steps(self):
+        expected = IntCodeCPU(counted_loop_program(1000))
+        expected.run(max_steps=500)
+
+        cpu = FastForwardIntCodeCPU(counted_loop_program(1000))
+        cpu.run(max_steps=500)
+
+        self.assertEqual(expected._intcodes, cpu._intcodes)
+        self.assertEqual(expected._ip, cpu._ip)
+
+    def test_profiler(self):
+        profiler = Profiler()
+        cpu = FastForwardIntCodeCPU(counted_loop_program(1000), tracer=profiler)
+        cpu.run()
+
+        self.assertEqual([3000], cpu.pop_output())
+        self.assertEqual(4002, profiler.nb_instrs + profiler.nb_skipped)
+        self.assertEqual({0: profiler.nb_skipped}, profiler.skipped)
+        self.assertLess(profiler.nb_instrs, 100)
+
+        out = StringIO()
+        profiler.report(file=out)
+
+        self.assertIn(f"Skipped instructions: {profiler.nb_skipped}", out.getvalue())
+
+
+class SummarizeLoopTest(TestCase):
+    def test_counted_loop(self):
+        program = counted_loop_program(1000)
+        summary = summarize_loop(program.__getitem__, 0, 12)
+
+        expected = LoopSummary(
+            head=0,
+            branch_ip=12,
+            nb_instrs=4,
+            inductions={(0, 19): {None: 1}, (0, 20): {None: 3}},
+            condition={(0, 19): 1, (0, 18): -1, None: 1},
+            relation="<",
+            cells={(0, 18), (0, 19), (0, 20), (0, 21)},
+        )
+        self.assertEqual(expected, summary)
+
+    def test_not_affine(self):
+        self.assertIsNone(summarize_loop(arith_program(100).__getitem__, 0, 16))
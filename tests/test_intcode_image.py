@@ -0,0 +1,60 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from aoc.intcode import IntCodeCPU, load_program, parse_program
+from aoc.intcode.image import IMAGE_SUFFIX, _images
+
+
+class ImageTest(TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "program.txt")
+
+    def tearDown(self):
+        _images.pop(self.path, None)
+        self._dir.cleanup()
+
+    def _write(self, program, mtime_ns):
+        with open(self.path, "w") as f:
+            f.write(program + "\n")
+
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_parse_program(self):
+        self.assertEqual((1, 2, -3), parse_program("1,2,-3"))
+        self.assertEqual((1, 2, -3), parse_program([1, 2, -3]))
+
+    def test_load_program(self):
+        self._write("1101,1,2,5,99,0", 10**18)
+
+        image = load_program(self.path)
+        self.assertEqual((1101, 1, 2, 5, 99, 0), image)
+        self.assertTrue(os.path.exists(self.path + IMAGE_SUFFIX))
+
+        # Later loads come from the sidecar, or from memory within the same process
+        _images.clear()
+        os.remove(self.path)
+        self._write("9999,9,9,9,99,9", 10**18)
+        self.assertEqual(image, load_program(self.path))
+
+        cpu = IntCodeCPU(image)
+        cpu.run()
+        self.assertEqual(3, cpu.peek(5))
+        self.assertEqual(0, image[5])
+
+    def test_modified_program_is_parsed_again(self):
+        self._write("1,2,3", 10**18)
+        load_program(self.path)
+
+        self._write("4,5,6", 2 * 10**18)
+        self.assertEqual((4, 5, 6), load_program(self.path))
+
+        _images.clear()
+        self.assertEqual((4, 5, 6), load_program(self.path))
+
+    def test_big_numbers(self):
+        self._write(f"104,{2**70},99", 10**18)
+
+        self.assertEqual((104, 2**70, 99), load_program(self.path))
+        self.assertFalse(os.path.exists(self.path + IMAGE_SUFFIX))
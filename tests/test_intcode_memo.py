@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from aoc.intcode import IntCodeCPU, MemoizedRunner, MemoStats, RunResult
+
+# Add each input to a running total and output it
+TOTAL = "3,11,1,11,12,12,4,12,1105,1,0,0,0"
+
+
+class CountingCPU(IntCodeCPU):
+    nb_created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        type(self).nb_created += 1
+
+
+class MemoizedRunnerTest(TestCase):
+    def test_run(self):
+        runner = MemoizedRunner()
+
+        self.assertEqual(RunResult((1, 3), False), runner.run(TOTAL, [1, 2]))
+        self.assertEqual(MemoStats(0, 1, 0), runner.stats)
+
+        self.assertEqual(RunResult((1, 3), False), runner.run(TOTAL, [1, 2]))
+        self.assertEqual(MemoStats(1, 1, 0), runner.stats)
+
+    def test_resume_after_prefix(self):
+        runner = MemoizedRunner()
+        runner.run(TOTAL, [1, 2])
+
+        self.assertEqual(RunResult((1, 3, 6), False), runner.run(TOTAL, [1, 2, 3]))
+        self.assertEqual(RunResult((1, 11), False), runner.run(TOTAL, [1, 10]))
+        self.assertEqual(MemoStats(0, 3, 2), runner.stats)
+
+    def test_live_cpus(self):
+        CountingCPU.nb_created = 0
+        runner = MemoizedRunner(cpu_class=CountingCPU, max_live=1)
+
+        for n in range(1, 5):
+            runner.run(TOTAL, range(1, n))
+        self.assertEqual(1, CountingCPU.nb_created)
+
+        # Branching off an earlier state, that only has its snapshot left
+        self.assertEqual(RunResult((1, 11), False), runner.run(TOTAL, [1, 10]))
+        self.assertEqual(2, CountingCPU.nb_created)
+
+        # The cpu of [1, 2, 3] isn't kept anymore
+        self.assertEqual(RunResult((1, 3, 6, 10), False), runner.run(TOTAL, [1, 2, 3, 4]))
+        self.assertEqual(3, CountingCPU.nb_created)
+
+    def test_halted(self):
+        runner = MemoizedRunner()
+
+        self.assertEqual(RunResult((1,), True), runner.run("3,5,4,5,99,0", [1]))
+        self.assertEqual(RunResult((), False), runner.run("3,5,4,5,99,0", []))
+
+    def test_maxsize(self):
+        runner = MemoizedRunner(maxsize=2)
+        runner.run(TOTAL, [1, 2])
+        runner.run(TOTAL, [5])
+
+        self.assertEqual(RunResult((1, 3), False), runner.run(TOTAL, [1, 2]))
+        self.assertEqual(MemoStats(0, 3, 1), runner.stats)
+
+    def test_images_released(self):
+        runner = MemoizedRunner(maxsize=2)
+        for n in range(10):
+            runner.run(f"104,{n},99", [])
+
+        # Only the images of the cached entries are kept
+        self.assertEqual(2, len(runner._image_ids))
+        self.assertEqual(RunResult((9,), True), runner.run("104,9,99", []))
+        self.assertEqual(MemoStats(1, 10, 0), runner.stats)
+
+        # An evicted image is added back
+        self.assertEqual(RunResult((0,), True), runner.run("104,0,99", []))
+        self.assertEqual(2, len(runner._image_ids))
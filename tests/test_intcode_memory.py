@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from aoc.intcode import PagedMemory
+
+
+class PagedMemoryTest(TestCase):
+    def test_peek_unwritten(self):
+        memory = PagedMemory()
+
+        self.assertEqual(0, memory.peek(10**12))
+        self.assertEqual(0, memory.nb_pages)
+
+    def test_poke(self):
+        memory = PagedMemory(page_size=16)
+        memory.poke(10**12, 42)
+        memory.poke(10**12 + 1, 43)
+        memory.poke(5, 1)
+
+        self.assertEqual(42, memory.peek(10**12))
+        self.assertEqual(43, memory.peek(10**12 + 1))
+        self.assertEqual(1, memory.peek(5))
+        self.assertEqual(2, memory.nb_pages)
+
+    def test_copy_on_write(self):
+        memory = PagedMemory(page_size=16)
+        memory.poke(0, 1)
+        memory.poke(100, 2)
+        memory.poke(200, 3)
+
+        other = memory.copy()
+        other.poke(0, 10)
+        memory.poke(100, 20)
+
+        self.assertEqual((1, 20), (memory.peek(0), memory.peek(100)))
+        self.assertEqual((10, 2), (other.peek(0), other.peek(100)))
+        self.assertIsNot(memory._pages[0], other._pages[0])
+        self.assertIs(memory._pages[200 // 16], other._pages[200 // 16])
@@ -0,0 +1,41 @@
+from io import StringIO
+from unittest import TestCase
+
+from aoc.intcode import IntCodeCPU, Op, Profiler
+
+
+class ProfilerTest(TestCase):
+    def test_counts(self):
+        # Sum 1..10 with a loop, then output it
+        program = [1, 21, 20, 21, 1001, 20, 1, 20, 1007, 20, 11, 22, 1005, 22, 0, 4, 21, 99, 0, 0, 1, 0, 0]
+        profiler = Profiler()
+        cpu = IntCodeCPU(program, tracer=profiler)
+        cpu.run()
+
+        self.assertEqual([55], cpu.pop_output())
+        self.assertEqual(42, profiler.nb_instrs)
+        self.assertEqual(10, profiler.ops[Op.BNE])
+        self.assertEqual(10, profiler.modes[Op.ADD, (0, 1, 0)])
+        self.assertEqual(10, profiler.addresses[0])
+        self.assertEqual(1, profiler.addresses[17])
+        self.assertEqual(22, profiler.high_water)
+
+    def test_relative_high_water(self):
+        # Store 7 through the relative base, then output it
+        profiler = Profiler()
+        cpu = IntCodeCPU([109, 5000, 21101, 3, 4, 0, 204, 0, 99], tracer=profiler)
+        cpu.run()
+
+        self.assertEqual([7], cpu.pop_output())
+        self.assertEqual(5000, profiler.high_water)
+
+    def test_report(self):
+        profiler = Profiler()
+        cpu = IntCodeCPU([1101, 1, 2, 5, 99, 0], tracer=profiler)
+        cpu.run()
+
+        out = StringIO()
+        profiler.report(file=out)
+
+        self.assertIn("Instructions: 2", out.getvalue())
+        self.assertRegex(out.getvalue(), r"ADD +110 +1 +50.00%")
@@ -0,0 +1,92 @@
+from io import BytesIO
+from unittest import TestCase
+
+from aoc.intcode import ENGINES, CompiledIntCodeCPU, IntCodeCPU, TraceRecorder, TraceReplayer
+from aoc.intcode.bench import arith_program
+
+# Add each input to a running total kept in far memory, and output it
+TOTAL = [3, 12, 1, 12, 10**9, 10**9, 4, 10**9, 1105, 1, 0, 0, 0]
+
+
+class ReplayTest(TestCase):
+    def _record(self, interval):
+        f = BytesIO()
+        recorder = TraceRecorder(f, checkpoint_interval=interval)
+
+        cpu = IntCodeCPU(TOTAL[:], tracer=recorder)
+        outputs = []
+        for v in range(1, 11):
+            cpu.run((v,))
+            outputs += cpu.pop_output()
+        recorder.close()
+
+        f.seek(0)
+        return TraceReplayer(f), recorder, outputs
+
+    def test_record(self):
+        replayer, recorder, outputs = self._record(7)
+
+        # 4 instructions per input, READ included
+        self.assertEqual(40, recorder.nb_instrs)
+        self.assertEqual(40, replayer.nb_instrs)
+        self.assertEqual(list(range(1, 11)), replayer.inputs)
+        self.assertEqual([sum(range(1, n + 1)) for n in range(1, 11)], outputs)
+        self.assertEqual([0, 7, 14, 21, 28, 35], [c.nb_instrs for c in replayer.checkpoints])
+
+    def test_seek(self):
+        replayer, _, _ = self._record(7)
+
+        for n in range(41):
+            with self.subTest(n=n):
+                cpu = replayer.seek(n)
+
+                nb_adds = n // 4 + (n % 4 >= 2)
+                self.assertEqual(sum(range(1, nb_adds + 1)), cpu._peek(10**9))
+                self.assertEqual([0, 2, 6, 8][n % 4], cpu._ip)
+
+    def test_seek_engines(self):
+        f = BytesIO()
+        recorder = TraceRecorder(f, checkpoint_interval=500)
+        IntCodeCPU(arith_program(100), tracer=recorder).run()
+        recorder.close()
+
+        for engine, cls in ENGINES.items():
+            f.seek(0)
+            replayer = TraceReplayer(f, cpu_class=cls)
+
+            for n in range(0, replayer.nb_instrs + 1, 37):
+                with self.subTest(engine=engine, n=n):
+                    expected = IntCodeCPU(arith_program(100))
+                    expected.run(max_steps=n)
+
+                    cpu = replayer.seek(n)
+                    self.assertEqual(expected._ip, cpu._ip)
+                    self.assertEqual(expected._intcodes, cpu._intcodes)
+
+    def test_seek_compiled(self):
+        f = BytesIO()
+        recorder = TraceRecorder(f)
+        IntCodeCPU(arith_program(1000), tracer=recorder).run()
+        recorder.close()
+
+        f.seek(0)
+        replayer = TraceReplayer(f, cpu_class=CompiledIntCodeCPU)
+
+        cpu = replayer.seek(1001)
+        self.assertEqual(4, cpu._ip)
+        self.assertEqual(179900, cpu.peek(23))
+
+    def test_seek_past_the_end(self):
+        replayer, _, _ = self._record(7)
+
+        with self.assertRaises(ValueError):
+            replayer.seek(41)
+
+    def test_resume_after_seek(self):
+        replayer, _, _ = self._record(100)
+
+        cpu = replayer.seek(20)
+        cpu.run((100,))
+
+        # The rest of the recorded input is still queued
+        self.assertEqual(sum(range(1, 11)) + 100, cpu.pop_output()[-1])
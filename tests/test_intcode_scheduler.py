@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+from aoc.intcode import Chain, IntCodeCPU, Mesh, Packets, Ring, Scheduler
+
+# Read a value and output it incremented by one
+INCREMENT = "3,9,1001,9,1,9,4,9,99,0"
+
+# Decrement the input and pass it on, halting when it reaches 0
+COUNTDOWN = "3,15,1001,15,-1,15,1006,15,14,4,15,1105,1,0,99,0"
+
+
+class SchedulerTest(TestCase):
+    def test_chain(self):
+        scheduler = Scheduler((IntCodeCPU(INCREMENT, i) for i in range(100)), Chain())
+        scheduler.send(0, 0)
+        scheduler.run()
+
+        self.assertEqual([100], scheduler.pop_output())
+
+        stats = scheduler.stats
+        self.assertEqual(100, stats.messages)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertAlmostEqual(100 / stats.elapsed, stats.messages_per_second)
+
+    def test_ring(self):
+        cpus = [IntCodeCPU(COUNTDOWN, i) for i in range(3)]
+        scheduler = Scheduler(cpus, Ring())
+        scheduler.send(0, 10)
+        scheduler.run()
+
+        self.assertEqual([], scheduler.pop_output())
+        self.assertEqual(9, scheduler.stats.messages)
+        self.assertEqual([True, False, False], [cpu.is_halted() for cpu in cpus])
+
+    def test_mesh(self):
+        cpus = [IntCodeCPU("104,7,99"), IntCodeCPU(INCREMENT), IntCodeCPU(INCREMENT)]
+        scheduler = Scheduler(cpus, Mesh())
+        scheduler.run()
+
+        self.assertEqual([8, 8, 8], scheduler.pop_output())
+        self.assertTrue(all(cpu.is_halted() for cpu in cpus))
+
+    def test_packets(self):
+        cpus = [
+            IntCodeCPU("104,1,104,42,104,43,99"),
+            IntCodeCPU("3,19,3,20,104,255,1,19,20,21,4,21,2,19,20,21,4,21,99,0,0,0"),
+        ]
+        scheduler = Scheduler(cpus, Packets(frame_size=3))
+        scheduler.run()
+
+        self.assertEqual([255, 85, 1806], scheduler.pop_output())
+
+    def test_output_ready_reschedules(self):
+        cpu = IntCodeCPU("104,1,104,2,104,3,99", output_limit=1)
+        scheduler = Scheduler([cpu], Chain())
+        scheduler.run()
+
+        self.assertEqual([1, 2, 3], scheduler.pop_output())
+        self.assertEqual(4, scheduler.stats.runs)
+
+    def test_quantum(self):
+        # Count to 1000 before outputting, while the other cpu outputs right away
+        slow = "1001,14,1,14,1007,14,1000,15,1005,15,0,104,100,99,0,0"
+        fast = "104,200,99"
+
+        scheduler = Scheduler([IntCodeCPU(slow), IntCodeCPU(fast)], Packets(frame_size=1))
+        scheduler.run()
+        self.assertEqual([100, 200], scheduler.pop_output())
+
+        scheduler = Scheduler([IntCodeCPU(slow), IntCodeCPU(fast)], Packets(frame_size=1), quantum=100)
+        scheduler.run()
+        self.assertEqual([200, 100], scheduler.pop_output())
+        self.assertEqual(32, scheduler.stats.runs)
+
+    def test_no_runs(self):
+        self.assertEqual(0.0, Scheduler([], Chain()).stats.messages_per_second)
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from aoc.intcode import IntCodeCPU, search
+
+# Output the input multiplied by itself
+SQUARE = "3,9,2,9,9,9,4,9,99,0"
+
+
+def _square(image, n):
+    cpu = IntCodeCPU(image)
+    cpu.run([n])
+    return cpu.pop_output()[0]
+
+
+class SearchTest(TestCase):
+    def test_max(self):
+        self.assertEqual((81, -9), search(_square, SQUARE, range(-9, 5), chunk_size=3, max_workers=2))
+
+    def test_key(self):
+        best = search(_square, SQUARE, range(-9, 5), key=lambda r: -r, chunk_size=3, max_workers=2)
+        self.assertEqual((0, 0), best)
+
+    def test_image_is_not_modified(self):
+        # Each run modifies its copy of the program, the next ones must still see the original
+        self.assertEqual((100, 10), search(_square, SQUARE, range(11), chunk_size=1, max_workers=2))
+
+    def test_empty_space(self):
+        self.assertIsNone(search(_square, SQUARE, [], max_workers=2))
@@ -0,0 +1,79 @@
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+from aoc.intcode import CompiledIntCodeCPU, ImageRegistry, IntCodeCPU, attach, search
+from aoc.intcode.shared import shared_memory
+
+requires_shared_memory = skipIf(shared_memory is None, "Shared memory requires python 3.8")
+
+# Output the input multiplied by itself
+SQUARE = "3,9,2,9,9,9,4,9,99,0"
+
+
+def _square(image, n):
+    cpu = IntCodeCPU(image)
+    cpu.run([n])
+    return cpu.pop_output()[0]
+
+
+def _image_type(image, _):
+    return type(image).__name__
+
+
+class ImageRegistryTest(TestCase):
+    @requires_shared_memory
+    def test_publish(self):
+        with ImageRegistry() as registry:
+            ref = registry.publish(SQUARE)
+
+            self.assertEqual(10, ref.size)
+            self.assertEqual(ref, registry.publish([3, 9, 2, 9, 9, 9, 4, 9, 99, 0]))
+            self.assertEqual([3, 9, 2, 9, 9, 9, 4, 9, 99, 0], attach(ref).tolist())
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(ref.name)
+
+    @requires_shared_memory
+    def test_big_numbers(self):
+        with ImageRegistry() as registry:
+            with self.assertRaises(OverflowError):
+                registry.publish([104, 2 ** 70, 99])
+
+    @requires_shared_memory
+    def test_copy_on_write(self):
+        with ImageRegistry() as registry:
+            image = attach(registry.publish(SQUARE))
+
+            for cls in (IntCodeCPU, CompiledIntCodeCPU):
+                cpu = cls(image)
+                self.assertIs(image, cpu._intcodes)
+
+                cpu.run([7])
+
+                self.assertEqual([49], cpu.pop_output())
+                self.assertIsInstance(cpu._intcodes, list)
+                self.assertEqual(0, image[9])
+
+    @requires_shared_memory
+    def test_typed_memory(self):
+        with ImageRegistry() as registry:
+            cpu = IntCodeCPU(attach(registry.publish(SQUARE)), typed_memory=True)
+            cpu.run([3])
+
+            self.assertEqual([9], cpu.pop_output())
+            self.assertEqual("q", cpu._intcodes.typecode)
+
+    @requires_shared_memory
+    def test_search(self):
+        self.assertEqual(("memoryview", 0), search(_image_type, SQUARE, [0], max_workers=1))
+        self.assertEqual((100, 10), search(_square, SQUARE, range(11), chunk_size=1, max_workers=2))
+
+    def test_search_big_numbers(self):
+        self.assertEqual(("tuple", 0), search(_image_type, [104, 2 ** 70, 99], [0], max_workers=1))
+
+    def test_search_without_shared_memory(self):
+        with patch("aoc.intcode.shared.shared_memory", None):
+            with self.assertRaises(NotImplementedError):
+                ImageRegistry().publish(SQUARE)
+
+            self.assertEqual(("tuple", 0), search(_image_type, SQUARE, [0], max_workers=1))
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from aoc.intcode import UNKNOWN, Poly, SymbolicError, run_symbolic, solve_for_output
+
+
+class SymbolicTest(TestCase):
+    def test_poly(self):
+        x = Poly.symbol(0, 2)
+        y = Poly.symbol(1, 2)
+
+        p = (x + 2) * (y + 3) * x
+        self.assertEqual(5 * 5 * 3, p(3, 2))
+        self.assertEqual(2, p.degree(0))
+        self.assertEqual(1, p.degree(1))
+        self.assertEqual(7, (x + 7) + x * -1)
+
+    def test_run_symbolic(self):
+        # [0] = [1] * [2] + 3
+        program = [1102, 0, 0, 0, 1001, 0, 3, 0, 99]
+        mem = run_symbolic(program, (1, 2))
+
+        self.assertEqual(4 * 5 + 3, mem[0](4, 5))
+
+    def test_symbolic_address(self):
+        # [3] gets overwritten, reading through the symbols is fine
+        program = [1, 0, 0, 3, 1, 1, 2, 0, 99]
+        mem = run_symbolic(program, (1, 2))
+
+        self.assertIs(UNKNOWN, mem[3])
+        self.assertEqual(9, mem[0](4, 5))
+
+    def test_symbolic_control_flow(self):
+        program = [1105, 0, 0, 99]
+        with self.assertRaises(SymbolicError):
+            run_symbolic(program, (1,))
+
+    def test_symbolic_store(self):
+        program = [1101, 0, 0, 0, 99]
+        with self.assertRaises(SymbolicError):
+            run_symbolic(program, (3,))
+
+    def test_solve_for_output(self):
+        # [0] = [1] * [2] + 3
+        program = [1102, 0, 0, 0, 1001, 0, 3, 0, 99]
+
+        self.assertEqual((4, 5), solve_for_output(program, (1, 2), 23, range(4, 10)))
+        self.assertIsNone(solve_for_output(program, (1, 2), 2, range(10)))
+
+    def test_solve_for_output_non_linear(self):
+        # [0] = [1] * [2] * [2]
+        program = [1102, 0, 0, 0, 2, 0, 2, 0, 99]
+
+        self.assertEqual((3, 4), solve_for_output(program, (1, 2), 48, range(1, 10)))